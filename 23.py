@@ -1,19 +1,48 @@
-import sys, os, ctypes, subprocess, shutil, random, time, winreg, math
+import sys, time
+STARTUP_STARTED = time.perf_counter()
+
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    # Scripted runs go straight to the Qt-free core; PyQt6 is never imported
+    from optimizer_core import run_headless
+    sys.exit(run_headless([arg for arg in sys.argv[1:] if arg != "--headless"]))
+
+if __name__ == "__main__" and "--startup-profile" not in sys.argv[1:]:
+    # Relaunch elevated before NumPy and Qt are loaded, which this process would never use
+    from optimizer_core import is_admin
+    if not is_admin():
+        try:
+            import ctypes
+            ctypes.windll.shell32.ShellExecuteW(
+                None, "runas", sys.executable, f'"{__file__}"', None, 1
+            )
+        except:
+            from PyQt6.QtWidgets import QApplication, QMessageBox
+            QApplication(sys.argv)
+            QMessageBox.critical(
+                None, "Admin Required",
+                "This application requires administrator privileges to run."
+            )
+        sys.exit()
+
+import os, random, math, json, csv
 from threading import Thread
-from datetime import datetime
+
+import numpy as np
 
 from PyQt6.QtCore import (
-    Qt, QTimer, QRectF, pyqtSignal, QObject,
+    Qt, QTimer, QRect, QRectF, pyqtSignal, QObject,
     QPropertyAnimation, QEasingCurve, pyqtProperty, QSequentialAnimationGroup,
-    QParallelAnimationGroup, QPointF, QSize
+    QParallelAnimationGroup, QPointF, QSize, QEvent
 )
-from PyQt6.QtGui import QColor, QPainter, QFont, QRadialGradient, QPen, QLinearGradient
+from PyQt6.QtGui import QColor, QPainter, QFont, QRadialGradient, QPen, QLinearGradient, QPixmap
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QPushButton, QLabel,
     QVBoxLayout, QProgressBar, QMessageBox, QGraphicsOpacityEffect,
-    QHBoxLayout, QFrame, QCheckBox, QToolButton, QStyle, QSizePolicy
+    QHBoxLayout, QFrame, QCheckBox, QToolButton, QStyle, QSizePolicy, QFileDialog
 )
 
+import optimizer_core
+from optimizer_core import APP_NAME, VERSION, CREATE_RESTORE_POINT, LOW_IMPACT_CLEANUP, app_data_dir
 
 DARK_THEME = {
     "window": "#060606",
@@ -35,837 +64,619 @@ LIGHT_THEME = {
     "warn": "#92400e"
 }
 
-APP_NAME = "23 Optimizer"
-VERSION = "V 2.0"
-
-SAFE_MODE = True
-CREATE_RESTORE_POINT = True
-
 # ===============================
-# ADMIN CHECK
+# STARTUP PROFILE
 # ===============================
-def is_admin():
-    try:
-        return ctypes.windll.shell32.IsUserAnAdmin()
-    except:
-        return False
+class StartupProfile:
+    """Milestones of one launch in ms since 23.py started executing
 
-# ===============================
-# SAFE REGISTRY OPERATIONS
-# ===============================
-class SafeRegistry:
-    @staticmethod
-    def set_value(key_path, value_name, value, value_type=winreg.REG_DWORD):
-        """Safely set registry value with error handling"""
+    imports, qapplication, window (OptimizerUI built), first_paint and
+    ready (deferred star field and settings icon done). The latest launch
+    is saved to app_data_dir/last_startup.json. state holds what was built
+    at each milestone, so deferral can be checked independent of timings.
+    """
+
+    def __init__(self, started):
+        self.started = started
+        self.marks = {}
+        self.state = {}
+
+    def mark(self, name):
+        self.marks.setdefault(name, round((time.perf_counter() - self.started) * 1000, 2))
+
+    def note(self, name, value):
+        self.state.setdefault(name, value)
+
+    def save(self, path=None):
+        path = path or os.path.join(app_data_dir(), "last_startup.json")
         try:
-            parts = key_path.split('\\', 1)
-            root_key = getattr(winreg, parts[0])
-            sub_key = parts[1]
-            
-            key = winreg.OpenKey(root_key, sub_key, 0, winreg.KEY_SET_VALUE | winreg.KEY_WOW64_64KEY)
-            winreg.SetValueEx(key, value_name, 0, value_type, value)
-            winreg.CloseKey(key)
-            return True
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.marks, f)
         except Exception as e:
-            print(f"Registry error: {e}")
-            return False
-    
-    @staticmethod
-    def backup_value(key_path, value_name):
-        """Backup a registry value before modifying"""
-        try:
-            parts = key_path.split('\\', 1)
-            root_key = getattr(winreg, parts[0])
-            sub_key = parts[1]
-            
-            key = winreg.OpenKey(root_key, sub_key, 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY)
-            value, _ = winreg.QueryValueEx(key, value_name)
-            winreg.CloseKey(key)
-            return value
-        except:
-            return None
+            print(f"Startup profile save error: {e}")
+        return path
+
+STARTUP = StartupProfile(STARTUP_STARTED)
 
 # ===============================
 # OPTIMIZER WORKER
 # ===============================
-class OptimizerWorker(QObject):
-    progress = pyqtSignal(int)
-    status = pyqtSignal(str)
-    substatus = pyqtSignal(str)
-    insight = pyqtSignal(str)
+class OptimizerWorker(optimizer_core.OptimizerWorker, QObject):
+    """The core worker with Qt signals, so connected slots run on the UI thread
+
+    progress, status, substatus and insight stay plain core signals; the UI
+    gets them coalesced and rate-limited through `snapshot`.
+    """
+    snapshot = pyqtSignal(dict)
     profile = pyqtSignal(dict)
     done = pyqtSignal(dict)
+    undone = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self):
-        super().__init__()
-        self.stats = {
-            'cleaned_mb': 0,
-            'optimizations_applied': 0,
-            'errors': 0,
-            'skipped': 0,
-            'duration': 0,
-            'focus': '',
-            'tier': '',
-            'disk_free_gb': 0
-        }
-        self.ai_profile = {}
-
-    def run(self):
-        start_time = time.time()
-        
-        try:
-            # Get system info
-            self.status.emit("Analyzing system...")
-            self.substatus.emit("Detecting hardware configuration")
-            self.sys = self.get_system_info()
-            time.sleep(0.5)
-
-            self.status.emit("AI planning optimization...")
-            self.substatus.emit("Building adaptive optimization profile")
-            self.ai_profile = self.build_ai_profile()
-            self.stats['focus'] = ", ".join(self.ai_profile["focus"])
-            self.stats['tier'] = self.ai_profile["tier"]
-            self.stats['disk_free_gb'] = self.ai_profile["disk_free"]
-            self.insight.emit(self.ai_profile["tagline"])
-            self.profile.emit(self.ai_profile)
-            time.sleep(0.4)
-            
-            # Create restore point if enabled
-            if CREATE_RESTORE_POINT and SAFE_MODE:
-                self.create_restore_point()
-            
-            # Define optimization steps
-            steps = self._get_optimization_steps()
-            
-            total = len(steps)
-            for i, (step_func, step_name, is_safe) in enumerate(steps):
-                if SAFE_MODE and not is_safe:
-                    self.substatus.emit(f"Skipped (advanced): {step_name}")
-                    self.stats['skipped'] += 1
-                    time.sleep(0.1)
-                else:
-                    try:
-                        self.status.emit(step_name)
-                        step_func()
-                        self.stats['optimizations_applied'] += 1
-                    except Exception as e:
-                        self.stats['errors'] += 1
-                        self.substatus.emit(f"Error in {step_name}: {str(e)}")
-                        time.sleep(0.3)
-                
-                self.progress.emit(int(((i + 1) / total) * 100))
-                time.sleep(0.15)
-            
-            self.stats['duration'] = time.time() - start_time
-            self.done.emit(self.stats)
-            
-        except Exception as e:
-            self.error.emit(f"Critical error: {str(e)}")
-
-    def _get_optimization_steps(self):
-        """Returns list of (function, name, is_safe) tuples"""
-        steps = [
-            # AI-guided cleanup
-            (self.clear_crash_dumps, "Clearing crash dumps", True),
-            (self.clear_shader_cache, "Clearing shader cache", True),
-            (self.clear_browser_cache, "Clearing browser caches", True),
-            (self.clear_spooler_cache, "Clearing print spooler cache", True),
-            (self.clear_cbs_logs, "Clearing system servicing logs", True),
-            (self.clear_dism_logs, "Clearing DISM logs", True),
-            (self.clear_icon_cache, "Clearing icon cache", True),
-            (self.clear_windows_update_cache, "Clearing Windows Update cache", True),
-
-            # Cleanup - All Safe
-            (self.clear_temp, "Cleaning temporary files", True),
-            (self.clear_prefetch, "Cleaning prefetch cache", True),
-            (self.clear_recycle_bin, "Emptying Recycle Bin", True),
-            (self.clear_error_reports, "Clearing error reports", True),
-            (self.clear_windows_logs, "Clearing Windows logs", True),
-            (self.clear_thumbnail_cache, "Clearing thumbnail cache", True),
-            (self.clear_delivery_optimization_cache, "Clearing delivery optimization cache", True),
-            
-            # Network - Safe
-            (self.flush_dns, "Flushing DNS cache", True),
-            (self.optimize_dns, "Optimizing DNS settings", True),
-            (self.reset_network, "Resetting network stack", True),
-            (self.optimize_adapter_power_saving, "Optimizing network adapter power settings", True),
-            (self.preserve_core_connectivity_services, "Preserving Wi-Fi/Bluetooth/Update services", True),
-            
-            # Disk - Safe (HDD/SSD aware)
-            (self.optimize_disk, "Optimizing storage", True),
-            (self.disable_last_access, "Disabling last access time", True),
-            (self.optimize_ntfs, "Optimizing NTFS", True),
-            
-            # System - Safe
-            (self.optimize_visuals, "Optimizing visual effects", True),
-            (self.optimize_explorer, "Optimizing File Explorer", True),
-            (self.optimize_startup, "Optimizing startup", True),
-            (self.reduce_menu_delay, "Reducing menu delays", True),
-            (self.optimize_notifications, "Reducing Windows suggestions", True),
-            (self.enable_storage_sense, "Enabling Storage Sense", True),
-            (self.optimize_background_apps, "Reducing background app load", True),
-            
-            # Services - Safe
-            (self.disable_telemetry, "Disabling telemetry", True),
-            (self.optimize_windows_search, "Optimizing Windows Search", True),
-            (self.disable_unnecessary_services, "Optimizing services", True),
-            
-            # Performance - Mostly Safe
-            (self.optimize_power_plan, "Setting high performance plan", True),
-            (self.optimize_game_mode, "Enabling Game Mode", True),
-            (self.disable_game_dvr, "Disabling Game DVR", True),
-]
-        return steps
-    # ===============================
-    # SYSTEM INFO
-    # ===============================
-    def get_system_info(self):
-        info = {}
-        
-        # CPU cores
-        info["cores"] = os.cpu_count() or 4
-        
-        # RAM
-        try:
-            mem = ctypes.c_ulonglong()
-            ctypes.windll.kernel32.GetPhysicallyInstalledSystemMemory(ctypes.byref(mem))
-            info["ram"] = int(mem.value / (1024 * 1024))  # Convert to GB
-        except:
-            info["ram"] = 8
-        
-        # GPU detection
-        try:
-            gpu_out = subprocess.run(
-                "wmic path win32_VideoController get name",
-                shell=True, capture_output=True, text=True, timeout=5
-            ).stdout.lower()
-            
-            if "nvidia" in gpu_out:
-                info["gpu"] = "nvidia"
-            elif "amd" in gpu_out or "radeon" in gpu_out:
-                info["gpu"] = "amd"
-            elif "intel" in gpu_out:
-                info["gpu"] = "intel"
-            else:
-                info["gpu"] = "unknown"
-        except:
-            info["gpu"] = "unknown"
-        
-        # Disk type detection (SSD vs HDD + presence)
-        info["has_disk"] = False
-        info["ssd"] = False
-        info["hdd"] = False
-        try:
-            drive_out = subprocess.run(
-                "wmic diskdrive get MediaType",
-                shell=True, capture_output=True, text=True, timeout=5
-            ).stdout.lower()
-
-            media_lines = [line.strip() for line in drive_out.splitlines() if line.strip() and "mediatype" not in line]
-            info["has_disk"] = len(media_lines) > 0
-            info["ssd"] = "ssd" in drive_out or "solid state" in drive_out
-            info["hdd"] = "hard disk" in drive_out or "hdd" in drive_out or "fixed hard disk" in drive_out
-        except:
-            # Fallback: check if TRIM is enabled (SSD indicator)
-            try:
-                trim_out = subprocess.run(
-                    "fsutil behavior query DisableDeleteNotify",
-                    shell=True, capture_output=True, text=True, timeout=5
-                ).stdout
-                info["ssd"] = "0" in trim_out
-                info["has_disk"] = True
-            except:
-                info["ssd"] = False
-
-        if info["has_disk"] and not info["ssd"]:
-            info["hdd"] = True
-
-        if not info["has_disk"]:
-            disk_label = "No Disk Detected"
-        elif info["ssd"]:
-            disk_label = "SSD"
-        elif info["hdd"]:
-            disk_label = "HDD"
-        else:
-            disk_label = "Disk"
-
-        self.substatus.emit(f"{info['cores']} cores | {info['ram']}GB RAM | {info['gpu'].upper()} GPU | {disk_label}")
-        return info
-
-    def get_disk_free_gb(self, drive="C:\\"):
-        try:
-            usage = shutil.disk_usage(drive)
-            return int(usage.free / (1024 ** 3))
-        except:
-            return 0
-
-    def build_ai_profile(self):
-        disk_free = self.get_disk_free_gb()
-        disk_low = disk_free < 12
-        cores = self.sys.get("cores", 4)
-        ram = self.sys.get("ram", 8)
-        gpu = self.sys.get("gpu", "unknown")
-
-        tier_score = (cores * 1.2) + (ram / 2) + (8 if self.sys.get("ssd") else 0)
-        if tier_score >= 26:
-            tier = "Elite"
-        elif tier_score >= 16:
-            tier = "Balanced"
-        else:
-            tier = "Lite"
-
-        focus = []
-        if disk_low:
-            focus.append("Storage")
-        if ram <= 8:
-            focus.append("Memory")
-        if cores <= 4:
-            focus.append("Responsiveness")
-        if gpu != "unknown":
-            focus.append("Graphics")
-        if not focus:
-            focus.append("System Balance")
-
-        tagline = f"AI Focus: {', '.join(focus)} • Tier: {tier} • Free Space: {disk_free}GB"
-        return {
-            "tier": tier,
-            "focus": focus,
-            "tagline": tagline,
-            "disk_low": disk_low,
-            "disk_free": disk_free
-        }
-
-    # ===============================
-    # SYSTEM RESTORE
-    # ===============================
-    def create_restore_point(self):
-        self.status.emit("Creating restore point...")
-        self.substatus.emit("Safety backup before optimization")
-        try:
-            subprocess.run(
-                'powershell -Command "Checkpoint-Computer -Description \'23 Optimizer Backup\' -RestorePointType \'MODIFY_SETTINGS\'"',
-                shell=True, timeout=30, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-            )
-            time.sleep(1)
-        except:
-            self.substatus.emit("Restore point creation skipped")
-
-    # ===============================
-    # CLEANUP OPERATIONS
-    # ===============================
-    def clear_temp(self):
-        self.substatus.emit("Removing temporary files")
-        size = 0
-        temp_paths = [
-            os.environ.get("TEMP", ""),
-            os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "Temp"),
-        ]
-        for path in temp_paths:
-            size += self._safe_delete(path)
-        self.stats['cleaned_mb'] += size
-
-    def clear_prefetch(self):
-        self.substatus.emit("Cleaning prefetch to improve boot time")
-        size = self._safe_delete(r"C:\Windows\Prefetch", "*.pf")
-        self.stats['cleaned_mb'] += size
-
-    def clear_recycle_bin(self):
-        self.substatus.emit("Emptying all recycle bins")
-        subprocess.run(
-            "PowerShell.exe -Command Clear-RecycleBin -Force -ErrorAction SilentlyContinue",
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10
-        )
-
-    def clear_error_reports(self):
-        self.substatus.emit("Removing error report files")
-        size = self._safe_delete(r"C:\ProgramData\Microsoft\Windows\WER\ReportQueue")
-        self.stats['cleaned_mb'] += size
-
-    def clear_windows_logs(self):
-        self.substatus.emit("Clearing Windows event logs")
-        try:
-            subprocess.run(
-                'for /F "tokens=*" %1 in (\'wevtutil.exe el\') DO wevtutil.exe cl "%1"',
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10
-            )
-        except:
-            pass
-
-    def clear_thumbnail_cache(self):
-        self.substatus.emit("Clearing thumbnail cache")
-        thumb_path = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Explorer")
-        size = self._safe_delete(thumb_path, "thumbcache_*.db")
-        self.stats['cleaned_mb'] += size
-
-    def clear_spooler_cache(self):
-        self.substatus.emit("Clearing print spooler cache")
-        try:
-            subprocess.run("net stop spooler", shell=True, stdout=subprocess.DEVNULL,
-                           stderr=subprocess.DEVNULL, timeout=10)
-        except:
-            pass
-        self.stats['cleaned_mb'] += self._safe_delete(r"C:\Windows\System32\spool\PRINTERS")
-        try:
-            subprocess.run("net start spooler", shell=True, stdout=subprocess.DEVNULL,
-                           stderr=subprocess.DEVNULL, timeout=10)
-        except:
-            pass
-
-    def clear_cbs_logs(self):
-        self.substatus.emit("Clearing component servicing logs")
-        self.stats['cleaned_mb'] += self._safe_delete(r"C:\Windows\Logs\CBS")
-
-    def clear_dism_logs(self):
-        self.substatus.emit("Clearing DISM logs")
-        self.stats['cleaned_mb'] += self._safe_delete(r"C:\Windows\Logs\DISM")
-
-    def clear_crash_dumps(self):
-        self.substatus.emit("Removing crash dump files")
-        paths = [
-            os.path.join(os.environ.get("LOCALAPPDATA", ""), "CrashDumps"),
-            r"C:\Windows\Minidump"
-        ]
-        size = 0
-        for path in paths:
-            size += self._safe_delete(path)
-        self.stats['cleaned_mb'] += size
-
-    def clear_shader_cache(self):
-        self.substatus.emit("Removing shader cache")
-        paths = [
-            os.path.join(os.environ.get("LOCALAPPDATA", ""), "D3DSCache"),
-            os.path.join(os.environ.get("LOCALAPPDATA", ""), "NVIDIA", "GLCache"),
-            os.path.join(os.environ.get("LOCALAPPDATA", ""), "AMD", "DxCache")
-        ]
-        size = 0
-        for path in paths:
-            size += self._safe_delete(path)
-        self.stats['cleaned_mb'] += size
-
-    def clear_browser_cache(self):
-        self.substatus.emit("Refreshing browser caches")
-        local = os.environ.get("LOCALAPPDATA", "")
-        paths = [
-            os.path.join(local, "Google", "Chrome", "User Data", "Default", "Cache"),
-            os.path.join(local, "Google", "Chrome", "User Data", "Default", "Code Cache"),
-            os.path.join(local, "Microsoft", "Edge", "User Data", "Default", "Cache"),
-            os.path.join(local, "Microsoft", "Edge", "User Data", "Default", "Code Cache")
-        ]
-        size = 0
-        for path in paths:
-            size += self._safe_delete(path)
-        self.stats['cleaned_mb'] += size
-
-    def clear_delivery_optimization_cache(self):
-        self.substatus.emit("Clearing delivery optimization cache")
-        path = r"C:\Windows\SoftwareDistribution\DeliveryOptimization\Cache"
-        self.stats['cleaned_mb'] += self._safe_delete(path)
-
-    def clear_icon_cache(self):
-        self.substatus.emit("Clearing Windows icon cache")
-        icon_path = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Microsoft", "Windows", "Explorer")
-        self.stats['cleaned_mb'] += self._safe_delete(icon_path, "iconcache_*.db")
-
-    def clear_windows_update_cache(self):
-        self.substatus.emit("Clearing Windows Update download cache")
-        for svc in ("wuauserv", "bits", "dosvc"):
-            subprocess.run(
-                f"net stop {svc}",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10
-            )
-        self.stats['cleaned_mb'] += self._safe_delete(r"C:\Windows\SoftwareDistribution\Download")
-        for svc in ("wuauserv", "bits", "dosvc"):
-            subprocess.run(
-                f"net start {svc}",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10
-            )
-
-
-    # ===============================
-    # NETWORK OPTIMIZATIONS
-    # ===============================
-    def flush_dns(self):
-        self.substatus.emit("Clearing DNS resolver cache")
-        subprocess.run("ipconfig /flushdns", shell=True,
-                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
-
-    def optimize_dns(self):
-        self.substatus.emit("Configuring DNS cache settings")
-        subprocess.run(
-            'reg add "HKLM\\SYSTEM\\CurrentControlSet\\Services\\Dnscache\\Parameters" '
-            '/v MaxCacheTtl /t REG_DWORD /d 86400 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def reset_network(self):
-        self.substatus.emit("Resetting network stack")
-        cmds = [
-            "netsh winsock reset",
-            "netsh int ip reset",
-            "netsh int tcp set global autotuninglevel=normal",
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL, timeout=5)
-
-    def optimize_adapter_power_saving(self):
-        self.substatus.emit("Optimizing network adapter power behavior")
-        cmds = [
-            'powercfg -setacvalueindex scheme_current sub_none CONNSTATUS 1',
-            'powercfg -setdcvalueindex scheme_current sub_none CONNSTATUS 1'
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL,
-                         stderr=subprocess.DEVNULL, timeout=5)
-
-    def preserve_core_connectivity_services(self):
-        self.substatus.emit("Ensuring Wi-Fi/Bluetooth/Update services remain enabled")
-        safe_enable = {
-            "wuauserv": "demand",
-            "bits": "demand",
-            "dosvc": "demand",
-            "WlanSvc": "auto",
-            "bthserv": "demand"
-        }
-        for svc, mode in safe_enable.items():
-            subprocess.run(
-                f"sc config {svc} start={mode}",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-            )
-
-    # ===============================
-    # DISK OPTIMIZATIONS (SSD/HDD Aware)
-    # ===============================
-    def optimize_disk(self):
-        if not self.sys.get("has_disk", True):
-            self.substatus.emit("No storage device detected - skipping storage optimization")
+# ===============================
+# ANIMATED PARTICLE SYSTEM
+# ===============================
+STAR_COUNT = 200
+NEBULA_RADIUS = 400
+
+# Animation timer interval (ms): bursts/rings on screen, stars only, window
+# hidden with effects still finishing. Lite machines use twice the visible
+# intervals; with nothing moving the timer stops altogether.
+FRAME_INTERVALS = {"active": 16, "ambient": 33, "hidden": 250}
+# Effect speeds below are per 16ms frame and scaled by the real elapsed time
+FRAME_MS = 16
+PARTICLE_COLORS = [QColor(239, 68, 68), QColor(220, 38, 38), QColor(248, 113, 113)]
+
+class ParticleBuffer:
+    """Structure-of-arrays pool: one NumPy array per field, live items in the first `count` rows
+
+    Spawning writes into rows left over from dead items, so bursts only
+    allocate when the pool outgrows its capacity (which then doubles).
+    """
+
+    def __init__(self, fields, capacity=64):
+        self.count = 0
+        self.capacity = capacity
+        self.arrays = {name: np.zeros(capacity, dtype) for name, dtype in fields.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        """Writable view of a field for the live items"""
+        return self.arrays[name][:self.count]
+
+    def __setitem__(self, name, value):
+        # Lets `pool['x'] += dx` work; the view was already updated in place
+        array = self.arrays[name]
+        if getattr(value, "base", None) is not array:
+            array[:self.count] = value
+
+    def spawn(self, count, **values):
+        """Append count items; values are scalars or arrays of length count"""
+        needed = self.count + count
+        if needed > self.capacity:
+            while self.capacity < needed:
+                self.capacity *= 2
+            for name, array in self.arrays.items():
+                grown = np.zeros(self.capacity, array.dtype)
+                grown[:self.count] = array[:self.count]
+                self.arrays[name] = grown
+        for name, value in values.items():
+            self.arrays[name][self.count:needed] = value
+        self.count = needed
+
+    def keep(self, alive):
+        """Compact the pool to the live items where alive (a bool array) is True"""
+        kept = int(np.count_nonzero(alive))
+        if kept == self.count:
             return
-
-        if self.sys.get("ssd"):
-            self.substatus.emit("Optimizing SSD (TRIM enabled)")
-            # Enable TRIM
-            subprocess.run(
-                "fsutil behavior set DisableDeleteNotify 0",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-            )
-            # Optimize SSD
-            subprocess.run(
-                "defrag C: /L /O",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30
-            )
-        elif self.sys.get("hdd"):
-            self.substatus.emit("Optimizing HDD (defragmentation)")
-            # Quick defrag for HDD
-            subprocess.run(
-                "defrag C: /U /V",
-                shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60
-            )
-        else:
-            self.substatus.emit("Storage type unknown - skipping defrag/TRIM for safety")
-
-    def disable_last_access(self):
-        self.substatus.emit("Disabling last access time tracking")
-        subprocess.run(
-            "fsutil behavior set disablelastaccess 1",
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def optimize_ntfs(self):
-        self.substatus.emit("Optimizing NTFS performance")
-        cmds = [
-            "fsutil behavior set memoryusage 2",
-            "fsutil behavior set mftzone 2",
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL, timeout=5)
-
-    # ===============================
-    # VISUAL & UI OPTIMIZATIONS
-    # ===============================
-    def optimize_visuals(self):
-        self.substatus.emit("Adjusting visual effects for performance")
-        subprocess.run(
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\VisualEffects" '
-            r'/v VisualFXSetting /t REG_DWORD /d 2 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def optimize_explorer(self):
-        self.substatus.emit("Optimizing File Explorer")
-        cmds = [
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced" /v LaunchTo /t REG_DWORD /d 1 /f',
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced" /v ShowSyncProviderNotifications /t REG_DWORD /d 0 /f',
-        ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL, timeout=5)
-
-    def optimize_startup(self):
-        self.substatus.emit("Reducing startup delays")
-        subprocess.run(
-            r'reg add "HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Serialize" '
-            r'/v StartupDelayInMSec /t REG_DWORD /d 0 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def reduce_menu_delay(self):
-        self.substatus.emit("Reducing menu show delay")
-        subprocess.run(
-            r'reg add "HKCU\Control Panel\Desktop" /v MenuShowDelay /t REG_SZ /d 0 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
+        for array in self.arrays.values():
+            array[:kept] = array[:self.count][alive]
+        self.count = kept
+
+    def clear(self):
+        self.count = 0
+
+class FrameProfiler:
+    """Per-frame animation timings kept in a fixed-size ring buffer
+
+    Each row is one timer tick: when it started, the interval since the
+    previous tick and the interval the timer was set to, time spent in
+    animate and in the paint that followed, and live object counts.
+    """
+
+    FIELDS = ("t", "interval_ms", "expected_ms", "animate_ms", "paint_ms", "stars", "particles", "rings", "comets")
+    # Upper edges (ms) of the frame-time histogram buckets; the last bucket is open-ended
+    HISTOGRAM_MS = (1, 2, 4, 8, 16, 33, 50, 100)
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+        self.enabled = False
+        self.rows = np.zeros((capacity, len(self.FIELDS)))
+        self.count = 0
+        self._last_tick = None
+
+    def reset(self):
+        self.count = 0
+        self._last_tick = None
+
+    def resume(self):
+        """The timer was stopped; the next interval is not a dropped frame"""
+        self._last_tick = None
+
+    def record_animate(self, started, finished, expected_ms, counts):
+        interval = expected_ms if self._last_tick is None else (started - self._last_tick) * 1000
+        self._last_tick = started
+        self.rows[self.count % self.capacity] = (
+            started, interval, expected_ms, (finished - started) * 1000, 0, *counts
         )
+        self.count += 1
+
+    def record_paint(self, elapsed_ms):
+        if self.count:
+            self.rows[(self.count - 1) % self.capacity, 4] += elapsed_ms
+
+    def frames(self):
+        """Recorded rows, oldest first"""
+        if self.count <= self.capacity:
+            return self.rows[:self.count]
+        return np.roll(self.rows, -(self.count % self.capacity), axis=0)
+
+    def summary(self, last=None):
+        """Aggregates over the buffer (or its newest `last` frames)"""
+        rows = self.frames()
+        if last:
+            rows = rows[-last:]
+        if not len(rows):
+            return {"frames": 0}
+        column = dict(zip(self.FIELDS, rows.T))
+        frame_ms = column["animate_ms"] + column["paint_ms"]
+        interval, expected = column["interval_ms"], column["expected_ms"]
+        histogram, _ = np.histogram(frame_ms, bins=(0,) + self.HISTOGRAM_MS + (np.inf,))
+        return {
+            "frames": len(rows),
+            "animate_ms": {"mean": float(column["animate_ms"].mean()), "p95": float(np.percentile(column["animate_ms"], 95))},
+            "paint_ms": {"mean": float(column["paint_ms"].mean()), "p95": float(np.percentile(column["paint_ms"], 95))},
+            "interval_ms": float(interval.mean()),
+            "jitter_ms": float(np.abs(interval - expected).mean()),
+            "dropped": int(np.maximum(np.rint(interval / expected) - 1, 0).sum()),
+            "objects": {name: int(column[name][-1]) for name in ("stars", "particles", "rings", "comets")},
+            "histogram": {
+                f"<{edge}ms" if edge != np.inf else f">={self.HISTOGRAM_MS[-1]}ms": int(count)
+                for edge, count in zip(self.HISTOGRAM_MS + (np.inf,), histogram)
+            }
+        }
 
-    def optimize_notifications(self):
-        self.substatus.emit("Reducing Windows tips and suggestions")
-        cmds = [
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\ContentDeliveryManager" /v SubscribedContent-338389Enabled /t REG_DWORD /d 0 /f',
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\ContentDeliveryManager" /v SubscribedContent-338388Enabled /t REG_DWORD /d 0 /f',
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\ContentDeliveryManager" /v SystemPaneSuggestionsEnabled /t REG_DWORD /d 0 /f'
+    def export(self, path):
+        """Write every buffered frame to path; .csv gives one row per frame, anything else JSON"""
+        rows = self.frames()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(self.FIELDS)
+                writer.writerows([*row[:5], *map(int, row[5:])] for row in rows.tolist())
+            else:
+                json.dump({
+                    "summary": self.summary(),
+                    "fields": self.FIELDS,
+                    "frames": rows.tolist()
+                }, f, indent=1)
+
+class SpriteAtlas:
+    """Soft dots and comet tail strips pre-rendered into one pixmap
+
+    A frame's stars, particles and comets become fragments of this pixmap
+    drawn with a single QPainter.drawPixmapFragments call; each fragment's
+    scale and opacity stand in for the per-item size and alpha.
+    """
+
+    DOT = 16
+    TAIL_LENGTH = 16
+    TAIL_WIDTH = 2
+
+    def __init__(self, colors):
+        """colors: {name: QColor}; every name gets a dot and a tail sprite"""
+        cell = self.DOT + 2
+        self.pixmap = QPixmap(cell * len(colors), cell + self.TAIL_WIDTH + 2)
+        self.pixmap.fill(Qt.GlobalColor.transparent)
+        self.dots = {}
+        self.tails = {}
+        painter = QPainter(self.pixmap)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        for index, (name, color) in enumerate(colors.items()):
+            left = index * cell + 1
+            painter.setBrush(color)
+            painter.drawEllipse(QRectF(left, 1, self.DOT, self.DOT))
+            self.dots[name] = QRectF(left, 1, self.DOT, self.DOT)
+            tail = QRectF(index * cell + 1, cell + 1, self.TAIL_LENGTH, self.TAIL_WIDTH)
+            painter.fillRect(tail, color)
+            self.tails[name] = tail
+        painter.end()
+
+    def dot_fragments(self, name, cx, cy, sizes, opacities):
+        """Fragments for dots of the given diameters centred on (cx, cy)"""
+        source = self.dots[name]
+        scales = (np.asarray(sizes) / self.DOT).tolist()
+        return [
+            QPainter.PixmapFragment.create(QPointF(x, y), source, scale, scale, 0, opacity)
+            for x, y, scale, opacity in zip(cx.tolist(), cy.tolist(), scales, np.asarray(opacities).tolist())
         ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL,
-                         stderr=subprocess.DEVNULL, timeout=5)
-
-    def optimize_background_apps(self):
-        self.substatus.emit("Reducing background app activity")
-        subprocess.run(
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\BackgroundAccessApplications" '
-            r'/v GlobalUserDisabled /t REG_DWORD /d 1 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def enable_storage_sense(self):
-        self.substatus.emit("Enabling Storage Sense automation")
-        subprocess.run(
-            r'reg add "HKCU\Software\Microsoft\Windows\CurrentVersion\StorageSense\Parameters\StoragePolicy" '
-            r'/v 01 /t REG_DWORD /d 1 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
 
-    # ===============================
-    # SERVICES & TELEMETRY
-    # ===============================
-    def disable_telemetry(self):
-        self.substatus.emit("Disabling telemetry and diagnostics")
-        cmds = [
-            r'reg add "HKLM\SOFTWARE\Policies\Microsoft\Windows\DataCollection" /v AllowTelemetry /t REG_DWORD /d 0 /f',
-            r'reg add "HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\DataCollection" /v AllowTelemetry /t REG_DWORD /d 0 /f',
+    def tail_fragments(self, name, x1, y1, x2, y2, opacities):
+        """Fragments for straight strokes from (x1, y1) to (x2, y2)"""
+        source = self.tails[name]
+        dx, dy = x2 - x1, y2 - y1
+        lengths = (np.hypot(dx, dy) / source.width()).tolist()
+        angles = np.degrees(np.arctan2(dy, dx)).tolist()
+        return [
+            QPainter.PixmapFragment.create(QPointF(x, y), source, length, 1, angle, opacity)
+            for x, y, length, angle, opacity in zip(((x1 + x2) / 2).tolist(), ((y1 + y2) / 2).tolist(),
+                                                    lengths, angles, np.asarray(opacities).tolist())
         ]
-        for cmd in cmds:
-            subprocess.run(cmd, shell=True, stdout=subprocess.DEVNULL, 
-                         stderr=subprocess.DEVNULL, timeout=5)
-        
-        # Disable DiagTrack service
-        subprocess.run("sc config DiagTrack start=disabled",
-                      shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
-
-    def optimize_windows_search(self):
-        self.substatus.emit("Optimizing Windows Search indexing")
-        subprocess.run(
-            r'reg add "HKLM\SOFTWARE\Microsoft\Windows Search" /v SetupCompletedSuccessfully /t REG_DWORD /d 0 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def disable_unnecessary_services(self):
-        self.substatus.emit("Disabling unnecessary background services")
-        # Only disable truly safe services
-        safe_services = ["DiagTrack", "dmwappushservice"]
-        for svc in safe_services:
-            subprocess.run(f"sc config {svc} start=disabled",
-                         shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5)
-
-    # ===============================
-    # PERFORMANCE OPTIMIZATIONS
-    # ===============================
-    def optimize_power_plan(self):
-        self.substatus.emit("Setting high performance power plan")
-        subprocess.run(
-            "powercfg -setactive 8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c",
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def optimize_game_mode(self):
-        self.substatus.emit("Enabling Windows Game Mode")
-        subprocess.run(
-            r'reg add "HKCU\Software\Microsoft\GameBar" /v AutoGameModeEnabled /t REG_DWORD /d 1 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    def disable_game_dvr(self):
-        self.substatus.emit("Disabling Game DVR for better FPS")
-        subprocess.run(
-            r'reg add "HKCU\System\GameConfigStore" /v GameDVR_Enabled /t REG_DWORD /d 0 /f',
-            shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
-        )
-
-    # ===============================
-    # SAFE DELETE HELPER
-    # ===============================
-    def _safe_delete(self, path, pattern="*"):
-        """Safely delete files with size tracking"""
-        if not path or not os.path.exists(path):
-            return 0
-        
-        size_freed = 0
-        try:
-            for item in os.listdir(path):
-                if pattern == "*" or item.endswith(pattern.replace("*", "")):
-                    try:
-                        item_path = os.path.join(path, item)
-                        if os.path.isfile(item_path):
-                            size = os.path.getsize(item_path) / (1024 * 1024)  # MB
-                            os.unlink(item_path)
-                            size_freed += size
-                        elif os.path.isdir(item_path):
-                            shutil.rmtree(item_path, ignore_errors=True)
-                    except:
-                        pass
-        except:
-            pass
-        
-        return size_freed
-
-# ===============================
-# ANIMATED PARTICLE SYSTEM
-# ===============================
-class Particle:
-    def __init__(self, x, y, vx, vy, size, color):
-        self.x = x
-        self.y = y
-        self.vx = vx
-        self.vy = vy
-        self.size = size
-        self.color = color
-        self.life = 1.0
-
-class PulseRing:
-    def __init__(self, x, y, max_radius=220, speed=6, color=QColor(239, 68, 68)):
-        self.x = x
-        self.y = y
-        self.radius = 0
-        self.max_radius = max_radius
-        self.speed = speed
-        self.alpha = 160
-        self.color = color
 
 # ===============================
 # GALAXY BACKGROUND WITH NEBULA
 # ===============================
 class GalaxyBackground(QWidget):
+    HUD_RECT = QRect(12, 12, 380, 62)
+
     def __init__(self):
         super().__init__()
-        self.stars = []
-        self.particles = []
-        self.comets = []
-        self.pulse_rings = []
+        self.frame_profiler = FrameProfiler()
+        self.rng = np.random.default_rng()
+        self.particles = ParticleBuffer({
+            'x': np.float32, 'y': np.float32, 'vx': np.float32, 'vy': np.float32,
+            'size': np.float32, 'life': np.float32, 'color': np.uint8
+        }, capacity=256)
+        self.comets = ParticleBuffer({
+            'x': np.float32, 'y': np.float32, 'vx': np.float32, 'vy': np.float32, 'life': np.float32
+        }, capacity=16)
+        self.pulse_rings = ParticleBuffer({
+            'x': np.float32, 'y': np.float32, 'radius': np.float32, 'max_radius': np.float32,
+            'speed': np.float32, 'alpha': np.float32, 'rgb': np.uint32
+        }, capacity=16)
         self.nebula_offset = 0
         self.scan_phase = 0
         self.visual_fx_enabled = False
+        self.performance_tier = ""
+        self._layers = None
+        self._atlases = {}
+        self._dirty_rect = QRect()
+        self._last_frame = time.monotonic()
         
-        # Create star field with twinkle
-        for _ in range(200):
-            self.stars.append({
-                'x': random.randint(0, 1200),
-                'y': random.randint(0, 800),
-                'size': random.uniform(1, 3),
-                'speed': random.uniform(0.3, 1.5),
-                'brightness': random.uniform(0.3, 1.0),
-                'twinkle_speed': random.uniform(0.02, 0.08),
-                'twinkle_phase': random.uniform(0, 6.28)
-            })
+        # Star field with twinkle; filled on the first animation tick, after the first frame
+        self.stars = ParticleBuffer({
+            'x': np.float32, 'y': np.float32, 'size': np.float32, 'speed': np.float32,
+            'brightness': np.float32, 'twinkle_speed': np.float32, 'twinkle_phase': np.float32
+        }, capacity=STAR_COUNT)
+        self._star_field_ready = False
         
         self.timer = QTimer(self)
         self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.animate)
-        self.timer.start(16)
+
+    def ensure_star_field(self):
+        if self._star_field_ready:
+            return
+        self._star_field_ready = True
+        self.stars.spawn(
+            STAR_COUNT,
+            x=self.rng.integers(0, max(1200, self.width()), STAR_COUNT),
+            y=self.rng.integers(0, max(800, self.height()), STAR_COUNT),
+            size=self.rng.uniform(1, 3, STAR_COUNT),
+            speed=self.rng.uniform(0.3, 1.5, STAR_COUNT),
+            brightness=self.rng.uniform(0.3, 1.0, STAR_COUNT),
+            twinkle_speed=self.rng.uniform(0.02, 0.08, STAR_COUNT),
+            twinkle_phase=self.rng.uniform(0, 6.28, STAR_COUNT)
+        )
 
     def add_particle_burst(self, x, y, count=20):
         """Add particle burst effect"""
-        colors = [QColor(239, 68, 68), QColor(220, 38, 38), QColor(248, 113, 113)]
-        for _ in range(count):
-            angle = random.uniform(0, 2 * 3.14159)
-            speed = random.uniform(2, 6)
-            self.particles.append(Particle(
-                x, y,
-                speed * random.uniform(-1, 1),
-                speed * random.uniform(-1, 1),
-                random.uniform(2, 5),
-                random.choice(colors)
-            ))
+        speed = self.rng.uniform(2, 6, count)
+        self.particles.spawn(
+            count, x=x, y=y,
+            vx=speed * self.rng.uniform(-1, 1, count),
+            vy=speed * self.rng.uniform(-1, 1, count),
+            size=self.rng.uniform(2, 5, count),
+            life=1.0,
+            color=self.rng.integers(0, len(PARTICLE_COLORS), count)
+        )
+        self._schedule_frame()
 
     def add_pulse_ring(self, x, y, color=QColor(248, 113, 113)):
-        self.pulse_rings.append(PulseRing(x, y, color=color))
-
-    def spawn_comet(self):
-        if random.random() < 0.03:
-            self.comets.append({
-                'x': random.randint(0, self.width()),
-                'y': random.randint(-200, 0),
-                'vx': random.uniform(-3, -1),
-                'vy': random.uniform(4, 7),
-                'life': 1.0
-            })
+        self.pulse_rings.spawn(1, x=x, y=y, radius=0, max_radius=220, speed=6, alpha=160, rgb=color.rgb())
+        self._schedule_frame()
+
+    def set_performance_tier(self, tier):
+        """Hardware tier from the optimizer profile; "Lite" halves the frame rate"""
+        self.performance_tier = tier
+        self._schedule_frame()
+
+    def spawn_comet(self, step=1.0):
+        if random.random() < 0.03 * step:
+            self.comets.spawn(
+                1,
+                x=random.randint(0, self.width()),
+                y=random.randint(-200, 0),
+                vx=random.uniform(-3, -1),
+                vy=random.uniform(4, 7),
+                life=1.0
+            )
 
     def animate(self):
+        profiling = self.frame_profiler.enabled
+        if profiling:
+            started = time.perf_counter()
+        now = time.monotonic()
+        step = min((now - self._last_frame) * 1000 / FRAME_MS, FRAME_INTERVALS["hidden"] / FRAME_MS)
+        self._last_frame = now
+
         if self.visual_fx_enabled:
             # Animate stars with twinkle
-            for star in self.stars:
-                star['y'] += star['speed']
-                if star['y'] > self.height():
-                    star['x'] = random.randint(0, self.width())
-                    star['y'] = 0
-                    star['brightness'] = random.uniform(0.3, 1.0)
-
-                # Twinkle effect
-                star['twinkle_phase'] += star['twinkle_speed']
-                star['brightness'] = 0.4 + 0.6 * abs(math.sin(star['twinkle_phase']))
+            self.ensure_star_field()
+            stars = self.stars
+            stars['y'] += stars['speed'] * step
+            wrapped = stars['y'] > self.height()
+            wrapped_count = int(np.count_nonzero(wrapped))
+            if wrapped_count:
+                stars['x'][wrapped] = self.rng.integers(0, max(1, self.width()), wrapped_count)
+                stars['y'][wrapped] = 0
+
+            # Twinkle effect
+            stars['twinkle_phase'] += stars['twinkle_speed'] * step
+            np.sin(stars['twinkle_phase'], out=stars['brightness'])
+            np.abs(stars['brightness'], out=stars['brightness'])
+            stars['brightness'] *= 0.6
+            stars['brightness'] += 0.4
         
         # Animate particles
-        for particle in self.particles[:]:
-            particle.x += particle.vx
-            particle.y += particle.vy
-            particle.vy += 0.2  # Gravity
-            particle.life -= 0.02
-            if particle.life <= 0:
-                self.particles.remove(particle)
-
-        for ring in self.pulse_rings[:]:
-            ring.radius += ring.speed
-            ring.alpha -= 4
-            if ring.radius > ring.max_radius or ring.alpha <= 0:
-                self.pulse_rings.remove(ring)
-
-        for comet in self.comets[:]:
-            comet['x'] += comet['vx']
-            comet['y'] += comet['vy']
-            comet['life'] -= 0.015
-            if comet['life'] <= 0 or comet['x'] < -200 or comet['y'] > self.height() + 200:
-                self.comets.remove(comet)
-
-        # Nebula drift
-        self.nebula_offset += 0.5
-        if self.nebula_offset > 360:
-            self.nebula_offset = 0
+        particles = self.particles
+        if particles.count:
+            particles['x'] += particles['vx'] * step
+            particles['y'] += particles['vy'] * step
+            particles['vy'] += 0.2 * step  # Gravity
+            particles['life'] -= 0.02 * step
+            particles.keep(particles['life'] > 0)
+
+        rings = self.pulse_rings
+        if rings.count:
+            rings['radius'] += rings['speed'] * step
+            rings['alpha'] -= 4 * step
+            rings.keep((rings['radius'] <= rings['max_radius']) & (rings['alpha'] > 0))
+
+        comets = self.comets
+        if comets.count:
+            comets['x'] += comets['vx'] * step
+            comets['y'] += comets['vy'] * step
+            comets['life'] -= 0.015 * step
+            comets.keep((comets['life'] > 0) & (comets['x'] >= -200) & (comets['y'] <= self.height() + 200))
 
         self.scan_phase = (self.scan_phase + 1) % 360
         if self.visual_fx_enabled:
-            self.spawn_comet()
+            # Nebula drift
+            self.nebula_offset += 0.5 * step
+            if self.nebula_offset > 360:
+                self.nebula_offset = 0
+            self.spawn_comet(step)
+            self.update()
         else:
+            # Only bursts and rings move: repaint where they are and where they were
             self.comets.clear()
+            dirty = self._effects_rect()
+            region = dirty.united(self._dirty_rect)
+            self._dirty_rect = dirty
+            if profiling:
+                region = region.united(self.HUD_RECT)
+            if not region.isEmpty():
+                self.update(region)
+
+        if profiling:
+            counts = (self.stars.count if self.visual_fx_enabled else 0,
+                      self.particles.count, self.pulse_rings.count, self.comets.count)
+            self.frame_profiler.record_animate(started, time.perf_counter(), self.timer.interval(), counts)
+        self._schedule_frame()
+
+    def _effects_rect(self):
+        """Bounding box of live particles and pulse rings (empty if there are none)"""
+        rect = QRect()
+        particles = self.particles
+        if particles.count:
+            margin = float(particles['size'].max())
+            rect = QRectF(
+                QPointF(float(particles['x'].min()) - margin, float(particles['y'].min()) - margin),
+                QPointF(float(particles['x'].max()) + margin, float(particles['y'].max()) + margin)
+            ).toAlignedRect()
+        rings = self.pulse_rings
+        if rings.count:
+            # Pen width 2 reaches one pixel past the radius
+            reach = rings['radius'] + 2
+            rect = rect.united(QRectF(
+                QPointF(float((rings['x'] - reach).min()), float((rings['y'] - reach).min())),
+                QPointF(float((rings['x'] + reach).max()), float((rings['y'] + reach).max()))
+            ).toAlignedRect())
+        return rect
+
+    def _schedule_frame(self):
+        """Run the timer at the rate what is on screen needs, or stop it when nothing moves"""
+        effects = bool(self.particles.count or self.pulse_rings.count)
+        handle = self.window().windowHandle()
+        shown = (self.isVisible() and not self.window().isMinimized()
+                 and (handle is None or handle.isExposed()))
+        if not shown:
+            # Let running effects expire slowly so they are gone when the window returns
+            interval = FRAME_INTERVALS["hidden"] if effects else None
+        elif effects or self.visual_fx_enabled:
+            interval = FRAME_INTERVALS["active" if effects else "ambient"]
+            if self.performance_tier == "Lite":
+                interval *= 2
+        else:
+            interval = None
 
-        self.update()
+        if interval is None:
+            self.timer.stop()
+        elif not self.timer.isActive() or self.timer.interval() != interval:
+            if not self.timer.isActive():
+                self._last_frame = time.monotonic()
+                self.frame_profiler.resume()
+            self.timer.start(interval)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_frame()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._schedule_frame()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.WindowStateChange:
+            self._schedule_frame()
 
     def paintEvent(self, event):
+        if not self.timer.isActive():
+            # A stopped timer may have been waiting for the window to be exposed again
+            self._schedule_frame()
+        paint_started = time.perf_counter()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
 
         light_mode = getattr(self, "theme", DARK_THEME) == LIGHT_THEME
 
-        # Background
-        bg = QRadialGradient(self.width()/2, self.height()/2,
-                            max(self.width(), self.height()))
+        # Background and red nebula, pre-rendered; the nebula drifts in a slow circle
+        background, nebula, glow = self._background_layers()
+        painter.drawPixmap(0, 0, background)
+        drift = math.radians(self.nebula_offset)
+        painter.drawPixmap(QPointF(
+            self.width()/2 + 50 * math.cos(drift) - NEBULA_RADIUS,
+            self.height()/2 + 50 * math.sin(drift) - NEBULA_RADIUS
+        ), nebula)
+
+        # Stars, particles and comets, back to front, as one batch of atlas fragments
+        atlas = self._sprite_atlas(light_mode)
+        fragments = []
+        if self.visual_fx_enabled:
+            stars = self.stars
+            half = stars['size'] / 2
+            fragments += atlas.dot_fragments("star", stars['x'] + half, stars['y'] + half,
+                                             stars['size'], stars['brightness'])
+
+        particles = self.particles
+        for index in range(len(PARTICLE_COLORS)):
+            if not particles.count:
+                break
+            mine = particles['color'] == index
+            if mine.any():
+                fragments += atlas.dot_fragments(f"particle{index}", particles['x'][mine], particles['y'][mine],
+                                                 particles['size'][mine], particles['life'][mine])
+
+        comets = self.comets
+        if self.visual_fx_enabled and comets.count:
+            opacity = 180 * comets['life'] / 255
+            fragments += atlas.tail_fragments("comet", comets['x'], comets['y'],
+                                              comets['x'] - comets['vx'] * 6, comets['y'] - comets['vy'] * 6,
+                                              np.maximum(40 / 255, opacity / 2))
+            fragments += atlas.dot_fragments("comet", comets['x'] + 1.5, comets['y'] + 1.5,
+                                             np.full(comets.count, 3.0), opacity)
+
+        if fragments:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawPixmapFragments(fragments, atlas.pixmap)
+
+        # Draw pulse rings
+        painter.setPen(Qt.PenStyle.NoPen)
+        rings = self.pulse_rings
+        for x, y, radius, alpha, rgb in zip(rings['x'].tolist(), rings['y'].tolist(), rings['radius'].tolist(),
+                                            rings['alpha'].tolist(), rings['rgb'].tolist()):
+            ring_color = QColor.fromRgb(rgb)
+            ring_color.setAlpha(max(0, int(alpha)))
+            pen = QPen(ring_color, 2)
+            painter.setPen(pen)
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawEllipse(QPointF(x, y), radius, radius)
+
+        # Soft glow overlay
+        painter.drawPixmap(0, 0, glow)
+
+        if self.frame_profiler.enabled:
+            self.frame_profiler.record_paint((time.perf_counter() - paint_started) * 1000)
+            self._draw_hud(painter, light_mode)
+
+    def _draw_hud(self, painter, light_mode):
+        """Frame statistics over the last second or so, top-left"""
+        summary = self.frame_profiler.summary(last=60)
+        if not summary["frames"]:
+            lines = ["Frame stats: waiting for frames"]
+        else:
+            objects = summary["objects"]
+            lines = [
+                f"animate {summary['animate_ms']['mean']:.2f} ms (p95 {summary['animate_ms']['p95']:.2f})"
+                f"  paint {summary['paint_ms']['mean']:.2f} ms (p95 {summary['paint_ms']['p95']:.2f})",
+                f"interval {summary['interval_ms']:.1f} ms  jitter {summary['jitter_ms']:.1f} ms"
+                f"  dropped {summary['dropped']}",
+                f"stars {objects['stars']}  particles {objects['particles']}"
+                f"  rings {objects['rings']}  comets {objects['comets']}"
+            ]
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor(255, 255, 255, 200) if light_mode else QColor(0, 0, 0, 160))
+        painter.drawRoundedRect(QRectF(self.HUD_RECT), 6, 6)
+        painter.setPen(QColor(17, 24, 39) if light_mode else QColor(229, 231, 235))
+        painter.setFont(QFont("Consolas", 8))
+        painter.drawText(
+            self.HUD_RECT.adjusted(8, 6, -8, -6),
+            Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+            "\n".join(lines)
+        )
+
+    def set_frame_stats_enabled(self, enabled: bool):
+        if enabled and not self.frame_profiler.enabled:
+            self.frame_profiler.reset()
+        self.frame_profiler.enabled = enabled
+        self.update(self.HUD_RECT)
+
+    def _sprite_atlas(self, light_mode):
+        atlas = self._atlases.get(light_mode)
+        if atlas is None:
+            star_rgb = 20 if light_mode else 255
+            comet_rgb = 25 if light_mode else 248
+            colors = {"star": QColor(star_rgb, star_rgb, star_rgb), "comet": QColor(comet_rgb, comet_rgb, comet_rgb)}
+            colors.update((f"particle{index}", color) for index, color in enumerate(PARTICLE_COLORS))
+            atlas = self._atlases[light_mode] = SpriteAtlas(colors)
+        return atlas
+
+    def resizeEvent(self, event):
+        self.invalidate_background()
+        super().resizeEvent(event)
+
+    def invalidate_background(self):
+        """Drop the pre-rendered layers after a size or theme change; rebuilt on next paint"""
+        self._layers = None
+
+    def _background_layers(self):
+        # The size check covers widgets resized while hidden, which get no resizeEvent yet
+        if self._layers is None or self._layers[0] != self.size():
+            light_mode = getattr(self, "theme", DARK_THEME) == LIGHT_THEME
+            self._layers = (self.size(), self._render_layers(light_mode))
+        return self._layers[1]
+
+    def _render_layers(self, light_mode):
+        """(background, nebula, glow) pixmaps for the current size and theme"""
+        width, height = self.width(), self.height()
+        ratio = self.devicePixelRatioF()
+
+        def layer(layer_width, layer_height, gradient):
+            pixmap = QPixmap(max(1, int(layer_width * ratio)), max(1, int(layer_height * ratio)))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.fillRect(QRectF(0, 0, layer_width, layer_height), gradient)
+            painter.end()
+            return pixmap
+
+        bg = QRadialGradient(width/2, height/2, max(width, height, 1))
         if light_mode:
             bg.setColorAt(0, QColor(248, 250, 252))
             bg.setColorAt(0.5, QColor(241, 245, 249))
@@ -874,79 +685,29 @@ class GalaxyBackground(QWidget):
             bg.setColorAt(0, QColor(10, 10, 10))
             bg.setColorAt(0.5, QColor(5, 5, 5))
             bg.setColorAt(1, QColor(0, 0, 0))
-        painter.fillRect(self.rect(), bg)
 
-        # Red nebula effect
-        nebula = QRadialGradient(
-            self.width()/2 + 50 * random.uniform(-1, 1),
-            self.height()/2 + 50 * random.uniform(-1, 1),
-            400
-        )
+        nebula = QRadialGradient(NEBULA_RADIUS, NEBULA_RADIUS, NEBULA_RADIUS)
         nebula.setColorAt(0, QColor(220, 38, 38, 20 if light_mode else 35))
         nebula.setColorAt(0.5, QColor(185, 28, 28, 12 if light_mode else 20))
         nebula.setColorAt(1, QColor(0, 0, 0, 0))
-        painter.fillRect(self.rect(), nebula)
-
-        if self.visual_fx_enabled:
-            # Draw stars
-            painter.setPen(Qt.PenStyle.NoPen)
-            star_rgb = 20 if light_mode else 255
-            for star in self.stars:
-                alpha = int(255 * star['brightness'])
-                painter.setBrush(QColor(star_rgb, star_rgb, star_rgb, alpha))
-                painter.drawEllipse(QRectF(star['x'], star['y'], star['size'], star['size']))
-        
-        # Draw particles
-        for particle in self.particles:
-            alpha = int(255 * particle.life)
-            color = QColor(particle.color)
-            color.setAlpha(alpha)
-            painter.setBrush(color)
-            painter.drawEllipse(QRectF(
-                particle.x - particle.size/2,
-                particle.y - particle.size/2,
-                particle.size, particle.size
-            ))
-
-        if self.visual_fx_enabled:
-            # Draw comets
-            painter.setPen(Qt.PenStyle.NoPen)
-            comet_rgb = 25 if light_mode else 248
-            for comet in self.comets:
-                alpha = int(180 * comet['life'])
-                painter.setBrush(QColor(comet_rgb, comet_rgb, comet_rgb, alpha))
-                painter.drawEllipse(QRectF(comet['x'], comet['y'], 3, 3))
-                tail_pen = QPen(QColor(comet_rgb, comet_rgb, comet_rgb, max(40, alpha // 2)), 2)
-                painter.setPen(tail_pen)
-                painter.drawLine(
-                    int(comet['x']),
-                    int(comet['y']),
-                    int(comet['x'] - comet['vx'] * 6),
-                    int(comet['y'] - comet['vy'] * 6)
-                )
 
-        # Draw pulse rings
-        painter.setPen(Qt.PenStyle.NoPen)
-        for ring in self.pulse_rings:
-            ring_color = QColor(ring.color)
-            ring_color.setAlpha(max(0, ring.alpha))
-            pen = QPen(ring_color, 2)
-            painter.setPen(pen)
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            painter.drawEllipse(QPointF(ring.x, ring.y), ring.radius, ring.radius)
-
-        # Soft glow overlay
-        glow = QRadialGradient(self.width() * 0.7, self.height() * 0.25, self.width() * 0.8)
+        glow = QRadialGradient(width * 0.7, height * 0.25, max(width * 0.8, 1))
         glow.setColorAt(0, QColor(248, 113, 113, 35))
         glow.setColorAt(0.7, QColor(239, 68, 68, 12))
         glow.setColorAt(1, QColor(0, 0, 0, 0))
-        painter.fillRect(self.rect(), glow)
+
+        return (
+            layer(width, height, bg),
+            layer(2 * NEBULA_RADIUS, 2 * NEBULA_RADIUS, nebula),
+            layer(width, height, glow)
+        )
 
     def set_visual_fx_enabled(self, enabled: bool):
         self.visual_fx_enabled = enabled
         if not enabled:
             self.comets.clear()
         self.update()
+        self._schedule_frame()
 
 # ===============================
 # STAT CARD WIDGET
@@ -1173,6 +934,9 @@ class GlowProgressBar(QProgressBar):
 # MAIN WINDOW
 # ===============================
 class OptimizerUI(GalaxyBackground):
+    # Emitted once the first frame is painted and the deferred startup work is done
+    ready = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.theme = DARK_THEME
@@ -1256,6 +1020,27 @@ class OptimizerUI(GalaxyBackground):
         self.progress.setValue(0)
         self.progress.setFormat("Ready")
 
+        # Pause/Stop, shown while an optimization runs
+        self.run_controls = QWidget()
+        controls_layout = QHBoxLayout(self.run_controls)
+        controls_layout.setContentsMargins(0, 0, 0, 0)
+        controls_layout.setSpacing(12)
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.setObjectName("settingAction")
+        self.pause_button.setCheckable(True)
+        self.pause_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.pause_button.setToolTip("Finish the running steps and hold before the next one")
+        self.pause_button.toggled.connect(self.toggle_pause)
+        self.stop_button = QPushButton("Stop")
+        self.stop_button.setObjectName("settingAction")
+        self.stop_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.stop_button.setToolTip("Stop now; running commands are ended and partial results kept")
+        self.stop_button.clicked.connect(self.stop_optimization)
+        controls_layout.addWidget(self.pause_button)
+        controls_layout.addWidget(self.stop_button)
+        self.run_controls.hide()
+        self.worker = None
+
         # Status labels
         self.status = QLabel("Ready to optimize")
         self.status.setFont(QFont("Segoe UI", 14, QFont.Weight.Bold))
@@ -1265,11 +1050,63 @@ class OptimizerUI(GalaxyBackground):
         self.substatus.setFont(QFont("Segoe UI", 11))
         self.substatus.setStyleSheet("color: #fca5a5;")
 
-        self.safety_note = QLabel("Restore point enabled for safe rollback")
+        self.safety_note = QLabel(self._safety_text(CREATE_RESTORE_POINT))
         self.safety_note.setFont(QFont("Segoe UI", 9))
         self.safety_note.setStyleSheet("color: #fcd34d;")
 
-        # Settings panel
+        # Settings panel, built the first time it is opened
+        self.settings_panel = None
+        self.restore_point_enabled = CREATE_RESTORE_POINT
+        # None (the partially checked box) leaves low-impact cleanup to the disk type
+        self.low_impact = LOW_IMPACT_CLEANUP
+        self.show_completion_dialog = True
+        self._undo_enabled = True
+        self.step_errors = []
+
+        # Layout assembly
+        content_layout.addLayout(top_bar)
+        content_layout.addWidget(self.title_label, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.subtitle_label, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addLayout(badges_layout)
+        content_layout.addWidget(self.header_line)
+        content_layout.addLayout(stats_layout)
+        content_layout.addSpacing(10)
+        content_layout.addWidget(self.button, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.progress, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.run_controls, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.status, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.substatus, alignment=Qt.AlignmentFlag.AlignHCenter)
+        content_layout.addWidget(self.safety_note, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._content_layout = content_layout
+
+        self.theme = DARK_THEME
+        self.set_visual_fx_enabled(True)
+        self.apply_theme()
+        self._first_frame_done = False
+
+        layout.addStretch(1)
+        layout.addLayout(content_layout)
+        layout.addStretch(1)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_frame_done:
+            self._first_frame_done = True
+            STARTUP.mark("first_paint")
+            STARTUP.note("first_paint_settings_panel", self.settings_panel is not None)
+            STARTUP.note("first_paint_stars", len(self.stars))
+            QTimer.singleShot(0, self._finish_startup)
+
+    def _finish_startup(self):
+        """Work kept off the path to the first frame"""
+        self._refresh_settings_icon()
+        if self.visual_fx_enabled:
+            self.ensure_star_field()
+        STARTUP.mark("ready")
+        STARTUP.note("ready_stars", len(self.stars))
+        self.ready.emit()
+
+    def _build_settings_panel(self):
         self.settings_panel = QFrame()
         self.settings_panel.setObjectName("settingsPanel")
         self.settings_panel.setMaximumWidth(640)
@@ -1297,50 +1134,97 @@ class OptimizerUI(GalaxyBackground):
         settings_layout.addWidget(self.settings_subtitle)
 
         self.visual_fx_checkbox = QCheckBox("Enable visual FX")
-        self.visual_fx_checkbox.setChecked(True)
+        self.visual_fx_checkbox.setChecked(self.visual_fx_enabled)
         self.visual_fx_checkbox.setMinimumHeight(30)
         self.visual_fx_checkbox.toggled.connect(self.set_visual_fx_enabled)
 
+        self.frame_stats_checkbox = QCheckBox("Show frame statistics")
+        self.frame_stats_checkbox.setChecked(self.frame_profiler.enabled)
+        self.frame_stats_checkbox.setMinimumHeight(30)
+        self.frame_stats_checkbox.toggled.connect(self.set_frame_stats_enabled)
+
+        self.export_stats_button = QPushButton("Export...")
+        self.export_stats_button.setObjectName("settingAction")
+        self.export_stats_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.export_stats_button.setEnabled(self.frame_profiler.enabled)
+        self.export_stats_button.clicked.connect(self.export_frame_stats)
+        self.frame_stats_checkbox.toggled.connect(self.export_stats_button.setEnabled)
+
+        fx_row = QHBoxLayout()
+        fx_row.setSpacing(18)
+        fx_row.addWidget(self.visual_fx_checkbox)
+        fx_row.addWidget(self.frame_stats_checkbox)
+        fx_row.addWidget(self.export_stats_button)
+        fx_row.addStretch()
+
         self.show_completion_checkbox = QCheckBox("Show completion dialog")
-        self.show_completion_checkbox.setChecked(True)
+        self.show_completion_checkbox.setChecked(self.show_completion_dialog)
         self.show_completion_checkbox.setMinimumHeight(30)
+        self.show_completion_checkbox.toggled.connect(
+            lambda checked: setattr(self, "show_completion_dialog", checked)
+        )
 
         self.theme_checkbox = QCheckBox("Light mode")
-        self.theme_checkbox.setChecked(False)
+        self.theme_checkbox.setChecked(self.theme == LIGHT_THEME)
         self.theme_checkbox.setMinimumHeight(30)
         self.theme_checkbox.toggled.connect(self.toggle_theme)
 
-        settings_layout.addWidget(self.visual_fx_checkbox)
+        self.restore_point_checkbox = QCheckBox("Create system restore point (slow)")
+        self.restore_point_checkbox.setChecked(self.restore_point_enabled)
+        self.restore_point_checkbox.setMinimumHeight(30)
+        self.restore_point_checkbox.toggled.connect(self.set_restore_point_enabled)
+
+        self.low_impact_checkbox = QCheckBox()
+        self.low_impact_checkbox.setTristate(True)
+        self.low_impact_checkbox.setCheckState(
+            Qt.CheckState.PartiallyChecked if self.low_impact is None
+            else Qt.CheckState.Checked if self.low_impact else Qt.CheckState.Unchecked
+        )
+        self.low_impact_checkbox.setMinimumHeight(30)
+        self.low_impact_checkbox.stateChanged.connect(lambda state: self.set_low_impact(Qt.CheckState(state)))
+        self.set_low_impact(self.low_impact_checkbox.checkState())
+
+        self.undo_button = QPushButton("Undo last run")
+        self.undo_button.setObjectName("settingAction")
+        self.undo_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.undo_button.setMinimumHeight(30)
+        self.undo_button.setEnabled(self._undo_enabled)
+        self.undo_button.clicked.connect(self.undo_last_run)
+
+        settings_layout.addLayout(fx_row)
         settings_layout.addWidget(self.show_completion_checkbox)
         settings_layout.addWidget(self.theme_checkbox)
+        settings_layout.addWidget(self.restore_point_checkbox)
+        settings_layout.addWidget(self.low_impact_checkbox)
+        settings_layout.addWidget(self.undo_button, alignment=Qt.AlignmentFlag.AlignLeft)
 
         self.visual_fx_checkbox.setToolTip("Animated stars and particle effects")
+        self.frame_stats_checkbox.setToolTip("Overlay animation and paint timings, jitter and dropped frames")
+        self.export_stats_button.setToolTip("Save the recorded frame timings as CSV or JSON")
         self.show_completion_checkbox.setToolTip("Show completion dialog after optimization")
         self.theme_checkbox.setToolTip("Switch between dark and light mode")
+        self.restore_point_checkbox.setToolTip("Also create a Windows restore point before optimizing")
+        self.low_impact_checkbox.setToolTip(
+            "Pace file deletion at background priority so the PC stays usable; slower cleanup"
+        )
+        self.undo_button.setToolTip("Restore the settings changed by the most recent optimization")
 
-        # Layout assembly
-        content_layout.addLayout(top_bar)
-        content_layout.addWidget(self.title_label, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.subtitle_label, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addLayout(badges_layout)
-        content_layout.addWidget(self.header_line)
-        content_layout.addLayout(stats_layout)
-        content_layout.addSpacing(10)
-        content_layout.addWidget(self.button, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.progress, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.status, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.substatus, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.safety_note, alignment=Qt.AlignmentFlag.AlignHCenter)
-        content_layout.addWidget(self.settings_panel, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._content_layout.addWidget(self.settings_panel, alignment=Qt.AlignmentFlag.AlignHCenter)
+        self._style_settings_panel()
 
-        self.theme = DARK_THEME
-        self.set_visual_fx_enabled(True)
-        self._refresh_settings_icon()
-        self.apply_theme()
+    def set_restore_point_enabled(self, enabled: bool):
+        self.restore_point_enabled = enabled
+        self.safety_note.setText(self._safety_text(enabled))
 
-        layout.addStretch(1)
-        layout.addLayout(content_layout)
-        layout.addStretch(1)
+    def set_low_impact(self, state):
+        self.low_impact = {Qt.CheckState.Checked: True, Qt.CheckState.Unchecked: False}.get(state)
+        mode = "auto, on for hard disks" if self.low_impact is None else "on" if self.low_impact else "off"
+        self.low_impact_checkbox.setText(f"Low-impact cleanup ({mode})")
+
+    def _set_undo_enabled(self, enabled):
+        self._undo_enabled = enabled
+        if self.settings_panel is not None:
+            self.undo_button.setEnabled(enabled)
 
     def start_optimization(self):
         # Visual feedback
@@ -1353,20 +1237,105 @@ class OptimizerUI(GalaxyBackground):
         self.progress.setFormat("Optimizing... %p%")
         
         # Start worker
-        self.worker = OptimizerWorker()
-        self.worker.progress.connect(self.update_progress)
-        self.worker.status.connect(self.update_status)
-        self.worker.substatus.connect(self.update_substatus)
-        self.worker.insight.connect(self.update_insight)
+        self._set_undo_enabled(False)
+        self.step_errors = []
+        self.worker = OptimizerWorker(restore_point=self.restore_point_enabled, low_impact=self.low_impact)
+        self.worker.snapshot.connect(self.apply_snapshot)
         self.worker.profile.connect(self.update_profile)
         self.worker.done.connect(self.finish_optimization)
         self.worker.error.connect(self.handle_error)
+        self._show_run_controls(True)
         
         Thread(target=self.worker.run, daemon=True).start()
 
+    def stop_optimization(self):
+        self.worker.cancel()
+        self.stop_button.setEnabled(False)
+        self.pause_button.setEnabled(False)
+        self.status.setText("Stopping...")
+
+    def toggle_pause(self, paused: bool):
+        if self.worker is None:
+            return
+        if paused:
+            self.worker.pause()
+        else:
+            self.worker.resume()
+        self.pause_button.setText("Resume" if paused else "Pause")
+        self.progress.setFormat("Paused %p%" if paused else "Optimizing... %p%")
+
+    def _show_run_controls(self, running):
+        self.pause_button.setChecked(False)
+        self.pause_button.setEnabled(True)
+        self.stop_button.setEnabled(True)
+        self.run_controls.setVisible(running)
+
+    def closeEvent(self, event):
+        # Do not leave a defrag or restore point running after the window is gone
+        if self.worker is not None:
+            self.worker.cancel()
+        super().closeEvent(event)
+
+    def undo_last_run(self):
+        self.button.stop_pulse()
+        self.button.setEnabled(False)
+        self._set_undo_enabled(False)
+        self.step_errors = []
+
+        self.worker = OptimizerWorker()
+        self.worker.snapshot.connect(self.apply_snapshot)
+        self.worker.undone.connect(self.finish_undo)
+        self.worker.error.connect(self.handle_error)
+
+        Thread(target=self.worker.undo_last_run, daemon=True).start()
+
+    def finish_undo(self, summary):
+        if summary['run'] is None:
+            self.status.setText("Nothing to undo")
+            self.substatus.setText("No journaled changes since the last undo")
+        else:
+            self.status.setText("↩ Last run undone")
+            self.substatus.setText(
+                f"Restored {summary['restored']} settings"
+                + (f" • {summary['failed']} could not be restored" if summary['failed'] else "")
+            )
+        self.button.setEnabled(True)
+        self._set_undo_enabled(True)
+        self.button.start_pulse()
+
+    def export_frame_stats(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export frame statistics", "frame_stats.csv", "CSV (*.csv);;JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            self.frame_profiler.export(path)
+            self.substatus.setText(f"Frame statistics saved to {os.path.basename(path)}")
+        except Exception as e:
+            QMessageBox.warning(self, "Export failed", str(e))
+
+    @staticmethod
+    def _safety_text(restore_point):
+        if restore_point:
+            return "Restore point enabled for safe rollback"
+        return "Changes are journaled • undo from Settings"
+
+    def apply_snapshot(self, snapshot):
+        """One coalesced batch of worker progress (only the fields that changed)"""
+        if "status" in snapshot:
+            self.status.setText(snapshot["status"])
+        if "substatus" in snapshot:
+            self.substatus.setText(snapshot["substatus"])
+        if "percent" in snapshot:
+            self.update_progress(snapshot["percent"])
+        self.step_errors += snapshot.get("errors", [])
+
     def update_progress(self, value):
+        # Snapshots skip values, so bursts fire when a 10% mark is crossed
+        crossed = value // 10 > self.progress.value() // 10
         self.progress.setValue(value)
-        if value % 10 == 0:  # Particle burst every 10%
+        if crossed:
             self.add_particle_burst(
                 random.randint(100, self.width()-100),
                 random.randint(100, self.height()-100),
@@ -1374,21 +1343,19 @@ class OptimizerUI(GalaxyBackground):
             )
             self.add_pulse_ring(self.width()//2, self.height()//2 + 50)
 
-    def update_status(self, text):
-        self.status.setText(text)
-
-    def update_substatus(self, text):
-        self.substatus.setText(text)
-
-    def update_insight(self, text):
-        self.substatus.setText(text)
-
     def update_profile(self, profile):
-        return
+        self.set_performance_tier(profile.get("tier", ""))
 
     def finish_optimization(self, stats):
-        self.status.setText("✨ Optimization Complete!")
-        self.substatus.setText("Your system has been optimized successfully")
+        self._show_run_controls(False)
+        if stats.get('cancelled'):
+            self.status.setText("⏹ Optimization stopped")
+            self.substatus.setText(
+                f"Stopped early • {stats['cleaned_mb']:.0f} MB cleaned • {stats['optimizations_applied']} applied"
+            )
+        else:
+            self.status.setText("✨ Optimization Complete!")
+            self.substatus.setText("Your system has been optimized successfully")
         
         # Update stat cards
         self.cleaned_card.set_value(f"{stats['cleaned_mb']:.0f}")
@@ -1400,7 +1367,7 @@ class OptimizerUI(GalaxyBackground):
         # Subtle particle burst
         self.add_particle_burst(self.width()//2, self.height()//2, 24)
         
-        if self.show_completion_checkbox.isChecked():
+        if self.show_completion_dialog and not stats.get('cancelled'):
             # Show summary
             msg = QMessageBox(self)
             msg.setWindowTitle("Optimization Complete")
@@ -1410,10 +1377,15 @@ class OptimizerUI(GalaxyBackground):
                 f"• Cleaned: {stats['cleaned_mb']:.0f} MB\n"
                 f"• Optimizations: {stats['optimizations_applied']}\n"
                 f"• Duration: {stats['duration']:.1f}s\n"
+                f"• Already optimal: {stats['compliant']}\n"
                 f"• Errors: {stats['errors']}\n"
                 f"• Skipped: {stats['skipped']} (advanced features)"
             )
             msg.setIcon(QMessageBox.Icon.Information)
+            details = list(self.step_errors)
+            details += [f"Timed out: {command}" for command in stats.get('timed_out', [])]
+            if details:
+                msg.setDetailedText("\n".join(details))
             msg.setStyleSheet("""
                 QMessageBox {
                     background: #1a1a1a;
@@ -1439,6 +1411,7 @@ class OptimizerUI(GalaxyBackground):
         self.button.setEnabled(True)
         self.button.set_busy(False)
         self.button.start_pulse()
+        self._set_undo_enabled(True)
         self.progress.setValue(0)
         self.progress.setFormat("Ready")
 
@@ -1464,6 +1437,8 @@ class OptimizerUI(GalaxyBackground):
         anim.start()
 
     def toggle_settings_panel(self):
+        if self.settings_panel is None:
+            self._build_settings_panel()
         currently_visible = self.settings_panel.isVisible()
         self._settings_open = not currently_visible
 
@@ -1492,6 +1467,7 @@ class OptimizerUI(GalaxyBackground):
 
     def apply_theme(self):
         is_light = self.theme == LIGHT_THEME
+        self.invalidate_background()
         accent = self.theme["accent"]
         bg = "rgba(248, 250, 252, 0.80)" if is_light else "rgba(2, 6, 23, 0.78)"
         panel_border = "#cbd5e1" if is_light else "#334155"
@@ -1533,6 +1509,20 @@ class OptimizerUI(GalaxyBackground):
                 padding-left: 1px;
                 background: {'#e2e8f0' if is_light else '#0f172a'};
             }}
+            QPushButton#settingAction {{
+                background: transparent;
+                color: {self.theme['muted']};
+                border: 1px solid {panel_border};
+                border-radius: 8px;
+                padding: 4px 14px;
+                font: 10pt 'Segoe UI';
+            }}
+            QPushButton#settingAction:hover {{
+                border: 1px solid {accent};
+            }}
+            QPushButton#settingAction:disabled {{
+                color: {panel_border};
+            }}
             QFrame#settingsPanel {{
                 background: {panel_bg};
                 border-radius: 12px;
@@ -1548,8 +1538,8 @@ class OptimizerUI(GalaxyBackground):
 
         self.title_label.setStyleSheet(f"color: {self.theme['text']}; letter-spacing: 2px;")
         self.subtitle_label.setStyleSheet(f"color: {self.theme['subtext']};")
-        self.settings_title.setStyleSheet(f"color: {self.theme['text']}; border: none;")
-        self.settings_subtitle.setStyleSheet(f"color: {self.theme['subtext']}; border: none;")
+        if self.settings_panel is not None:
+            self._style_settings_panel()
         self.header_line.setStyleSheet(
             f"background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 rgba(239,68,68,0), stop:0.5 {accent}, stop:1 rgba(239,68,68,0)); border-radius: 1px;"
         )
@@ -1585,12 +1575,17 @@ class OptimizerUI(GalaxyBackground):
 
         self.title_style_refresh()
 
+    def _style_settings_panel(self):
+        self.settings_title.setStyleSheet(f"color: {self.theme['text']}; border: none;")
+        self.settings_subtitle.setStyleSheet(f"color: {self.theme['subtext']}; border: none;")
+
     def title_style_refresh(self):
         self.status.setStyleSheet(f"color: {self.theme['accent']}; letter-spacing: 0.5px;")
         self.substatus.setStyleSheet(f"color: {self.theme['subtext']};")
         self.safety_note.setStyleSheet(f"color: {self.theme['warn']};")
 
     def handle_error(self, error_msg):
+        self._show_run_controls(False)
         self.status.setText("❌ Error occurred")
         self.substatus.setText(error_msg)
         self.progress.setFormat("Error")
@@ -1600,28 +1595,22 @@ class OptimizerUI(GalaxyBackground):
         self.button.setEnabled(True)
         self.button.set_busy(False)
         self.button.start_pulse()
+        self._set_undo_enabled(True)
 
 # ===============================
 # ENTRY POINT
 # ===============================
 if __name__ == "__main__":
-    if not is_admin():
-        # Request admin privileges
-        try:
-            ctypes.windll.shell32.ShellExecuteW(
-                None, "runas", sys.executable, f'"{__file__}"', None, 1
-            )
-        except:
-            QApplication(sys.argv)
-            QMessageBox.critical(
-                None, "Admin Required",
-                "This application requires administrator privileges to run."
-            )
-        sys.exit()
-
+    # Administrator check and elevation happen at the top of the file
+    STARTUP.mark("imports")
     app = QApplication(sys.argv)
+    STARTUP.mark("qapplication")
     win = OptimizerUI()
+    STARTUP.mark("window")
+    win.ready.connect(STARTUP.save)
+    if "--startup-profile" in sys.argv[1:]:
+        # Print the launch milestones as JSON once the window is ready, then quit
+        win.ready.connect(lambda: (print(json.dumps({**STARTUP.marks, "state": STARTUP.state})), app.quit()))
     win.show()
 
-
     sys.exit(app.exec())
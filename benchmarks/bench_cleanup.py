@@ -0,0 +1,312 @@
+"""Cleanup engine benchmark over reproducible synthetic trees
+
+Each case builds a tree under a sandbox root, points the optimizer's
+cleanup targets (%TEMP%, %LOCALAPPDATA%, C:\\Windows, C:\\ProgramData) at
+the sandbox through OptimizerWorker.path_map and environment variables,
+then measures:
+
+  estimate_cold_s / estimate_warm_s  analyze() with an empty / primed DirectoryIndex
+  clean_s, files_per_s, mb_per_s     the clear_* deletion path (_clean_targets)
+  peak_kb                            peak Python allocations during a clean (tracemalloc)
+  estimate_ok / clean_ok / kept_ok   byte and file accounting matches the generated
+                                     tree, and files outside the rules survive
+
+Each case selects only its own step. deselected_step puts another step's
+files (icon caches) in the same folder and checks they are kept.
+
+The throttled_* cases clean the same trees through the low-impact
+IoThrottle and check that the achieved ops/s and MB/s stay under its
+limits (limit_ok). The aimd_* cases check the latency feedback: with an
+unreachable latency target the rate must fall to its floor, with a
+generous one it must stay at the ceiling (adapt_ok).
+
+Usage:
+  python benchmarks/bench_cleanup.py [--root DIR] [--scale 1.0] [--seed 23]
+                                     [--save-baseline] [--tolerance 0.5]
+
+Exits non-zero when accounting is wrong or a metric regresses past the
+tolerance against benchmarks/baselines/cleanup_<platform>.json.
+"""
+import argparse
+import os
+import random
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from common import load_optimizer, save_baseline, compare_baseline, print_table
+
+# metric: (better direction, absolute change ignored as noise). Throughput is
+# checked through clean_s, since files and bytes per case are fixed.
+DIRECTIONS = {
+    "clean_s": ("lower", 0.05),
+    "estimate_cold_s": ("lower", 0.05),
+    "estimate_warm_s": ("lower", 0.02),
+    "peak_kb": ("lower", 256),
+}
+
+
+class Tree:
+    """Generated files: what the rules should remove and what must be left alone"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.bytes = 0
+        self.files = 0
+        self.kept = []
+
+    def file(self, path, size, read_only=False, sparse=False):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            if sparse:
+                # Large files are sparse so building the tree stays fast; sizes still count
+                f.truncate(size)
+            else:
+                f.write(self.rng.randbytes(size))
+        if read_only:
+            os.chmod(path, stat.S_IREAD)
+        self.bytes += size
+        self.files += 1
+
+    def keep(self, path, size=128):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"k" * size)
+        self.kept.append(path)
+
+    def link(self, path, target):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.symlink(target, path, target_is_directory=os.path.isdir(target))
+        # Links are removed themselves and accounted at their own (lstat) size
+        self.bytes += os.lstat(path).st_size
+        self.files += 1
+
+
+def build_tiny_files(tree, target, scale):
+    for index in range(int(20000 * scale)):
+        folder = os.path.join(target, f"d{index % 200:03d}")
+        tree.file(os.path.join(folder, f"f{index}.tmp"), tree.rng.randint(0, 4096))
+
+
+def build_huge_files(tree, target, scale):
+    for index in range(4):
+        tree.file(os.path.join(target, f"dump{index}.dmp"), int(256 * 1024 * 1024 * scale), sparse=True)
+
+
+def build_deep_nesting(tree, target, scale):
+    folder = target
+    for depth in range(max(2, int(200 * scale))):
+        folder = os.path.join(folder, f"n{depth}")
+        for index in range(2):
+            tree.file(os.path.join(folder, f"s{index}.bin"), tree.rng.randint(16, 2048))
+
+
+def build_read_only(tree, target, scale):
+    for index in range(int(2000 * scale)):
+        tree.file(os.path.join(target, f"CbsPersist_{index}.log"), tree.rng.randint(64, 8192), read_only=True)
+
+
+def build_links(tree, target, scale, outside):
+    for index in range(int(200 * scale)):
+        kept_file = os.path.join(outside, f"linked{index}.dat")
+        tree.keep(kept_file)
+        tree.link(os.path.join(target, f"file_link{index}"), kept_file)
+    kept_dir = os.path.join(outside, "linked_dir")
+    tree.keep(os.path.join(kept_dir, "inside.dat"))
+    tree.link(os.path.join(target, "dir_link"), kept_dir)
+    tree.file(os.path.join(target, "Report.wer"), 4096)
+
+
+def build_mixed_patterns(tree, target, scale):
+    for index in range(int(500 * scale)):
+        tree.file(os.path.join(target, f"thumbcache_{index}.db"), tree.rng.randint(1024, 65536))
+        tree.keep(os.path.join(target, f"explorer_{index}.dat"))
+
+
+def build_deselected_step(tree, target, scale):
+    # Icon caches share the Explorer folder but clear_icon_cache is not selected
+    for index in range(int(500 * scale)):
+        tree.file(os.path.join(target, f"thumbcache_{index}.db"), tree.rng.randint(1024, 65536))
+        tree.keep(os.path.join(target, f"iconcache_{index}.db"))
+
+
+# case: (clear_* step, builder); the builder fills that step's first target folder
+CASES = {
+    "tiny_files": ("clear_temp", build_tiny_files),
+    "huge_files": ("clear_crash_dumps", build_huge_files),
+    "deep_nesting": ("clear_shader_cache", build_deep_nesting),
+    "read_only": ("clear_cbs_logs", build_read_only),
+    "links": ("clear_error_reports", build_links),
+    "mixed_patterns": ("clear_thumbnail_cache", build_mixed_patterns),
+    "deselected_step": ("clear_thumbnail_cache", build_deselected_step),
+}
+
+
+# case: (tree case, IoThrottle arguments, expected final rate fraction or None)
+THROTTLED_CASES = {
+    "throttled_tiny_files": ("tiny_files", {"ops_per_s": 8000, "target_latency": 10.0}, None),
+    "throttled_huge_files": ("huge_files", {"bytes_per_s": 512 * 1024 * 1024, "target_latency": 10.0}, None),
+    "aimd_slow_disk": ("read_only", {"ops_per_s": 4000, "target_latency": 1e-9, "adjust_interval": 0.05}, 0.05),
+    "aimd_fast_disk": ("read_only", {"ops_per_s": 4000, "target_latency": 10.0, "adjust_interval": 0.05}, 1.0),
+}
+
+
+def sandbox_worker(optimizer, root):
+    """A worker whose cleanup targets all live under root"""
+    os.environ["LOCALAPPDATA"] = os.path.join(root, "LocalAppData")
+    os.environ["TEMP"] = os.path.join(root, "Temp")
+    os.environ["SystemRoot"] = os.path.join(root, "Windows")
+    worker = optimizer.OptimizerWorker(trace=False)
+    worker.path_map = {
+        "C:\\Windows": os.path.join(root, "Windows"),
+        "C:\\ProgramData": os.path.join(root, "ProgramData"),
+    }
+    return worker
+
+
+def build_case(optimizer, root, case, seed, scale):
+    step, builder = CASES[case]
+    if os.path.exists(root):
+        shutil.rmtree(root, onerror=_force_remove)
+    worker = sandbox_worker(optimizer, root)
+    # Each case runs only its own step, as --steps does
+    worker.only_steps = {step}
+    target = worker._cleanup_targets()[step][0][0]
+    tree = Tree(random.Random(f"{seed}:{case}"))
+    if builder is build_links:
+        builder(tree, target, scale, os.path.join(root, "outside"))
+    else:
+        builder(tree, target, scale)
+    return worker, step, tree
+
+
+def run_case(optimizer, root, case, seed, scale):
+    worker, step, tree = build_case(optimizer, root, case, seed, scale)
+    index_path = os.path.join(root, "scan_index.json")
+
+    started = time.perf_counter()
+    cold = worker.analyze(optimizer.DirectoryIndex(index_path))[step]
+    estimate_cold = time.perf_counter() - started
+    started = time.perf_counter()
+    warm = worker.analyze(optimizer.DirectoryIndex(index_path))[step]
+    estimate_warm = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cleaned_mb = worker._clean_targets(step)
+    clean_s = time.perf_counter() - started
+    cleaned_bytes = round(cleaned_mb * 1024 * 1024)
+    cleaned_files = worker.stats["cleaned_files"]
+    worker.deleter.close()
+
+    target = worker._cleanup_targets()[step][0][0]
+    kept_here = {os.path.basename(path) for path in tree.kept if os.path.dirname(path) == target}
+    leftovers = [name for name in os.listdir(target) if name not in kept_here]
+
+    # Second build of the same tree for the memory measurement, which slows the run down
+    worker, step, _ = build_case(optimizer, root, case, seed, scale)
+    tracemalloc.start()
+    worker._clean_targets(step)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    worker.deleter.close()
+
+    return {
+        "files": tree.files,
+        "mb": tree.bytes / (1024 * 1024),
+        "estimate_cold_s": estimate_cold,
+        "estimate_warm_s": estimate_warm,
+        "clean_s": clean_s,
+        "files_per_s": tree.files / clean_s if clean_s else 0.0,
+        "mb_per_s": tree.bytes / (1024 * 1024) / clean_s if clean_s else 0.0,
+        "peak_kb": peak / 1024,
+        "estimate_ok": cold["bytes"] == warm["bytes"] == tree.bytes and cold["files"] == warm["files"] == tree.files,
+        "clean_ok": cleaned_bytes == tree.bytes and cleaned_files == tree.files and not leftovers,
+        "kept_ok": all(os.path.exists(path) for path in tree.kept),
+    }
+
+
+def run_throttled_case(optimizer, root, case, seed, scale):
+    tree_case, arguments, expected_fraction = THROTTLED_CASES[case]
+    worker, step, tree = build_case(optimizer, root, tree_case, seed, scale)
+    throttle = optimizer.IoThrottle(**arguments)
+    worker.deleter.throttle = throttle
+
+    started = time.perf_counter()
+    cleaned_mb = worker._clean_targets(step)
+    clean_s = time.perf_counter() - started
+    cleaned_files = worker.stats["cleaned_files"]
+    worker.deleter.close()
+
+    # Deletes plus the folder removals at the end all take operation tokens;
+    # the opening burst is free
+    ops_limit, bytes_limit = throttle.max_ops, throttle.max_bytes
+    ops_s = max(0.0, tree.files - ops_limit * throttle.burst) / ops_limit
+    bytes_s = max(0.0, tree.bytes - bytes_limit * throttle.burst) / bytes_limit
+    return {
+        "files": tree.files,
+        "mb": tree.bytes / (1024 * 1024),
+        "clean_s": clean_s,
+        "files_per_s": tree.files / clean_s if clean_s else 0.0,
+        "mb_per_s": tree.bytes / (1024 * 1024) / clean_s if clean_s else 0.0,
+        "wait_s": throttle.waited,
+        "rate_fraction": throttle.fraction,
+        "clean_ok": round(cleaned_mb * 1024 * 1024) == tree.bytes and cleaned_files == tree.files,
+        "limit_ok": clean_s >= 0.95 * max(ops_s, bytes_s) if expected_fraction is None else True,
+        "adapt_ok": expected_fraction is None or throttle.fraction == expected_fraction,
+    }
+
+
+def _force_remove(function, path, _):
+    os.chmod(path, stat.S_IWRITE)
+    function(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", help="sandbox directory (default: a new temp dir, removed afterwards)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for file counts and sizes")
+    parser.add_argument("--seed", type=int, default=23)
+    parser.add_argument("--cases", nargs="*", default=list(CASES) + list(THROTTLED_CASES),
+                        choices=list(CASES) + list(THROTTLED_CASES))
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline (scale 1 only)")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed fractional slowdown against the baseline")
+    args = parser.parse_args()
+
+    optimizer = load_optimizer()
+    workdir = args.root or tempfile.mkdtemp(prefix="bench_cleanup_")
+    results = {}
+    try:
+        for case in args.cases:
+            run = run_throttled_case if case in THROTTLED_CASES else run_case
+            results[case] = run(optimizer, os.path.join(workdir, case), case, args.seed, args.scale)
+    finally:
+        if not args.root:
+            shutil.rmtree(workdir, onerror=_force_remove)
+
+    print_table(results, ["files", "mb", "estimate_cold_s", "estimate_warm_s", "clean_s", "files_per_s",
+                          "mb_per_s", "peak_kb", "wait_s", "rate_fraction", "estimate_ok", "clean_ok", "kept_ok",
+                          "limit_ok", "adapt_ok"])
+
+    if args.save_baseline and args.scale == 1.0:
+        print(f"Baseline saved to {save_baseline('cleanup', results)}")
+        return 0
+    if args.scale != 1.0:
+        # Throughput depends on tree size, so baselines are only comparable at scale 1
+        found, regressions = True, []
+    else:
+        found, regressions = compare_baseline("cleanup", results, DIRECTIONS, args.tolerance)
+    if not found:
+        print("No baseline for this platform; run with --save-baseline to create one")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    checks = ("estimate_ok", "clean_ok", "kept_ok", "limit_ok", "adapt_ok")
+    failed = [case for case, metrics in results.items() if not all(metrics.get(check, True) for check in checks)]
+    return 1 if regressions or failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
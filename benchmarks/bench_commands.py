@@ -0,0 +1,106 @@
+"""Command host benchmark: round-trip cost and sentinel framing
+
+Runs the same short command through a persistent CommandHost and through
+one subprocess.run(shell=True) per call, and reports the per-command
+round trip in ms for both. On Windows the host is a cmd.exe session; on
+Linux the PosixShellBackend stand-in exercises the same framing.
+
+Each framing case also checks what run() returns (framing_ok): the
+command's exact output and exit code, within the timeout, with the host
+still usable afterwards. no_trailing_newline covers output that ends
+mid-line, where the sentinel shares a line with it.
+
+Usage:
+  python benchmarks/bench_commands.py [--calls 200]
+
+Exits non-zero when a framing case fails.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import load_optimizer, print_table
+
+# case: (command, expected stdout, expected exit code)
+if os.name == "nt":
+    FRAMING_CASES = {
+        "newline": ("echo foo", "foo\n", 0),
+        "no_trailing_newline": ("<NUL set /p =foo", "foo", 0),
+        "multi_line": ("echo a& echo b", "a\nb\n", 0),
+        "exit_code": ("cmd /c exit 3", "", 3),
+    }
+    ROUND_TRIP = "ver"
+else:
+    FRAMING_CASES = {
+        "newline": ("echo foo", "foo\n", 0),
+        "no_trailing_newline": ("printf foo", "foo", 0),
+        "multi_line": ("printf 'a\\nb\\n'", "a\nb\n", 0),
+        "exit_code": ("sh -c 'exit 3'", "", 3),
+    }
+    ROUND_TRIP = "true"
+
+
+def run_framing_case(optimizer, case):
+    command, expected, code = FRAMING_CASES[case]
+    host = optimizer.CommandHost()
+    try:
+        started = time.perf_counter()
+        try:
+            result = host.run(command, timeout=5)
+            output, returncode = result.stdout, result.returncode
+        except subprocess.TimeoutExpired as e:
+            output, returncode = e.output, None
+        ms = (time.perf_counter() - started) * 1000
+        follow_up = host.run(ROUND_TRIP, timeout=5).returncode == 0
+        return {
+            "ms": ms,
+            "spawns": host.spawns,
+            "framing_ok": output == expected and returncode == code and follow_up and host.spawns == 1,
+        }
+    finally:
+        host.close()
+
+
+def run_round_trip(optimizer, calls):
+    host = optimizer.CommandHost()
+    try:
+        host.run(ROUND_TRIP)
+        samples = []
+        for _ in range(calls):
+            started = time.perf_counter()
+            host.run(ROUND_TRIP)
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        host.close()
+    spawned = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        subprocess.run(ROUND_TRIP, shell=True, capture_output=True)
+        spawned.append((time.perf_counter() - started) * 1000)
+    return {
+        "host": {"ms": statistics.median(samples)},
+        "subprocess": {"ms": statistics.median(spawned)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    optimizer = load_optimizer()
+    results = {case: run_framing_case(optimizer, case) for case in FRAMING_CASES}
+    results.update(run_round_trip(optimizer, args.calls))
+    print_table(results, ["ms", "spawns", "framing_ok"])
+
+    failed = [case for case, metrics in results.items() if not metrics.get("framing_ok", True)]
+    for case in failed:
+        print(f"FRAMING FAILED {case}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
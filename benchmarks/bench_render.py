@@ -0,0 +1,193 @@
+"""Offscreen rendering benchmark for GalaxyBackground, OptimizerUI and the animated widgets
+
+Runs on the offscreen Qt platform (no display needed). For every
+combination of window size, star count, particle load, visual FX on/off
+and theme, a GalaxyBackground is advanced with animate() and rendered
+into a QImage for N frames; particle load is held steady by topping up
+bursts. It also renders the full OptimizerUI, steps the AnimatedButton
+glow (a stylesheet rebuild per step) and pulse (opacity effect) and the
+PulseLabel fade, and samples the CPU the running pulse animations use.
+
+Reports mean/median/p95/p99 frame cost in ms per case.
+
+Usage:
+  python benchmarks/bench_render.py [--frames 60] [--quick]
+                                    [--save-baseline] [--tolerance 1.0]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import load_app, percentile, save_baseline, compare_baseline, print_table
+
+SIZES = [(800, 600), (1280, 800), (1920, 1080)]
+STAR_COUNTS = [200, 2000]
+PARTICLE_LOADS = [0, 500, 5000]
+
+# metric: (better direction, absolute change ignored as noise). The tails
+# (mean, p95, p99) are reported but not gated: on a shared machine a handful
+# of preempted frames moves them by 2x, while the median stays put.
+DIRECTIONS = {
+    "median_ms": ("lower", 1.0),
+    "cpu_ms_per_s": ("lower", 25.0),
+}
+
+
+def timings(samples):
+    return {
+        "frames": len(samples),
+        "mean_ms": sum(samples) / len(samples),
+        "median_ms": percentile(samples, 0.5),
+        "p95_ms": percentile(samples, 0.95),
+        "p99_ms": percentile(samples, 0.99),
+    }
+
+
+def bench_galaxy(optimizer, size, stars, load, fx, light, frames):
+    from PyQt6.QtGui import QImage
+
+    optimizer.STAR_COUNT = stars
+    widget = optimizer.GalaxyBackground()
+    widget.resize(*size)
+    widget.theme = optimizer.LIGHT_THEME if light else optimizer.DARK_THEME
+    widget.set_visual_fx_enabled(fx)
+    image = QImage(size[0], size[1], QImage.Format.Format_ARGB32_Premultiplied)
+
+    samples = []
+    for frame in range(frames + 5):
+        if len(widget.particles) < load:
+            widget.add_particle_burst(size[0] // 2, size[1] // 2, load - len(widget.particles))
+        # Fixed 16ms steps so every run simulates the same motion
+        widget._last_frame = time.monotonic() - optimizer.FRAME_MS / 1000
+        started = time.perf_counter()
+        widget.animate()
+        widget.render(image)
+        elapsed = (time.perf_counter() - started) * 1000
+        if frame >= 5:  # warm-up frames build the cached layers and atlas
+            samples.append(elapsed)
+    widget.timer.stop()
+    widget.deleteLater()
+    return timings(samples)
+
+
+def bench_window(optimizer, light, frames):
+    from PyQt6.QtGui import QImage
+
+    window = optimizer.OptimizerUI()
+    window.resize(1000, 750)
+    window.toggle_theme(light)
+    image = QImage(1000, 750, QImage.Format.Format_ARGB32_Premultiplied)
+    samples = []
+    for frame in range(frames + 5):
+        window._last_frame = time.monotonic() - optimizer.FRAME_MS / 1000
+        started = time.perf_counter()
+        window.animate()
+        window.render(image)
+        if frame >= 5:
+            samples.append((time.perf_counter() - started) * 1000)
+    window.timer.stop()
+    window.deleteLater()
+    return timings(samples)
+
+
+def bench_widget_steps(widget, apply_step, steps, repeats):
+    """Cost of one animation step: apply_step(value) then a render of the widget"""
+    from PyQt6.QtGui import QImage
+
+    image = QImage(widget.size(), QImage.Format.Format_ARGB32_Premultiplied)
+    samples = []
+    for value in list(steps) * repeats:
+        started = time.perf_counter()
+        apply_step(value)
+        widget.render(image)
+        samples.append((time.perf_counter() - started) * 1000)
+    return timings(samples)
+
+
+def animation_cpu(app, seconds):
+    """CPU ms per wall-clock second while the event loop runs the widgets' animations"""
+    cpu_started, wall_started = time.process_time(), time.monotonic()
+    while time.monotonic() - wall_started < seconds:
+        app.processEvents()
+        time.sleep(0.001)
+    return (time.process_time() - cpu_started) * 1000 / (time.monotonic() - wall_started)
+
+
+def bench_widgets(optimizer, app, frames):
+    results = {}
+    button = optimizer.AnimatedButton("START OPTIMIZATION")
+    button.resize(320, 60)
+    glow_steps = list(range(0, 31, 2)) + list(range(30, -1, -2))
+    results["button_glow_step"] = bench_widget_steps(
+        button, lambda value: setattr(button, "glow_intensity", value), glow_steps, max(1, frames // 30))
+    pulse_steps = [0.82 + 0.18 * index / 20 for index in range(21)]
+    results["button_pulse_step"] = bench_widget_steps(
+        button, button.opacity_effect.setOpacity, pulse_steps + pulse_steps[::-1], max(1, frames // 40))
+
+    label = optimizer.PulseLabel("Ready to optimize")
+    label.resize(300, 30)
+    label.opacity_anim.stop()
+    results["pulse_label_step"] = bench_widget_steps(
+        label, label.opacity_effect.setOpacity, pulse_steps + pulse_steps[::-1], max(1, frames // 40))
+
+    # Both animations running on shown widgets, as on the main screen
+    button.show()
+    button.start_pulse()
+    label.show()
+    label.opacity_anim.start()
+    results["pulse_animations_running"] = {"cpu_ms_per_s": animation_cpu(app, 2.0)}
+    button.stop_pulse()
+    label.opacity_anim.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=60, help="measured frames per case")
+    parser.add_argument("--quick", action="store_true", help="one window size and star count")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="allowed fractional slowdown against the baseline (frame times are noisy)")
+    args = parser.parse_args()
+
+    from PyQt6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    optimizer = load_app()
+    sizes = SIZES[1:2] if args.quick else SIZES
+    star_counts = STAR_COUNTS[:1] if args.quick else STAR_COUNTS
+
+    # Untimed warm-up so the first case does not pay for font and pixmap caches
+    bench_galaxy(optimizer, sizes[0], star_counts[0], PARTICLE_LOADS[1], True, False, 10)
+
+    results = {}
+    for size, stars, load, fx, light in itertools.product(sizes, star_counts, PARTICLE_LOADS,
+                                                          (True, False), (False, True)):
+        if not fx and stars != star_counts[0]:
+            continue  # stars are not drawn with FX off
+        case = (f"galaxy {size[0]}x{size[1]} stars={stars} particles={load} "
+                f"fx={'on' if fx else 'off'} {'light' if light else 'dark'}")
+        results[case] = bench_galaxy(optimizer, size, stars, load, fx, light, args.frames)
+    for light in (False, True):
+        results[f"window 1000x750 {'light' if light else 'dark'}"] = bench_window(optimizer, light, args.frames)
+    results.update(bench_widgets(optimizer, app, args.frames))
+
+    print_table(results, ["frames", "mean_ms", "median_ms", "p95_ms", "p99_ms", "cpu_ms_per_s"])
+
+    if args.save_baseline and not args.quick:
+        print(f"Baseline saved to {save_baseline('render', results)}")
+        return 0
+    found, regressions = compare_baseline("render", results, DIRECTIONS, args.tolerance)
+    if not found:
+        print("No baseline for this platform; run with --save-baseline to create one")
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
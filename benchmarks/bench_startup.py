@@ -0,0 +1,108 @@
+"""Cold-start benchmark and startup budget for the UI and the headless runner
+
+Launches `23.py --startup-profile` on the offscreen Qt platform, which
+prints the launch milestones (ms since 23.py started executing) once the
+window is ready and quits:
+
+  imports       NumPy, PyQt6 and optimizer_core loaded
+  qapplication  QApplication created
+  window        OptimizerUI constructed
+  first_paint   first frame painted
+  ready         deferred work (star field, settings icon) done
+
+plus wall_ms for the whole process, and the wall time of
+`23.py --headless --list-steps`. Reports the median over --runs launches.
+
+This is a benchmark run by hand, not part of a test suite (the repo has
+none). It exits non-zero when:
+
+  - a launch breaks the deferral: milestones out of order, the settings
+    panel built before the first paint, or the star field not filled
+    between the first paint and ready. These hold on any machine.
+  - a median is over its millisecond budget. The budgets were tuned on one
+    development machine; use --budget-scale elsewhere.
+
+Usage:
+  python benchmarks/bench_startup.py [--runs 5] [--budget-scale 1.0]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from common import REPO_DIR, print_table
+
+MILESTONES = ("imports", "qapplication", "window", "first_paint", "ready")
+
+# Median ms allowed per milestone; scale with --budget-scale on slow machines
+BUDGET_MS = {
+    "ui": {"window": 500, "first_paint": 600, "ready": 750},
+    "headless": {"wall_ms": 400},
+}
+
+
+def launch(args):
+    """Run 23.py with args; returns (stdout, wall ms)"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, os.path.join(REPO_DIR, "23.py"), *args],
+                               capture_output=True, text=True, env=env, timeout=60, check=True)
+    return completed.stdout, (time.perf_counter() - started) * 1000
+
+
+def deferral_problems(marks, state):
+    """What a launch did on the path to the first frame that should have waited"""
+    problems = []
+    times = [marks[name] for name in MILESTONES]
+    if times != sorted(times):
+        problems.append("milestones out of order: " + ", ".join(f"{name} {marks[name]:.0f}" for name in MILESTONES))
+    if state.get("first_paint_settings_panel"):
+        problems.append("settings panel built before the first paint")
+    if state.get("first_paint_stars"):
+        problems.append(f"{state['first_paint_stars']} stars spawned before the first paint")
+    if not state.get("ready_stars"):
+        problems.append("star field still empty at ready")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiplier for every budget")
+    args = parser.parse_args()
+
+    samples = {"ui": [], "headless": []}
+    deferral = []
+    for run in range(args.runs):
+        stdout, wall = launch(["--startup-profile"])
+        marks = json.loads(stdout.strip().splitlines()[-1])
+        deferral.extend(f"run {run + 1}: {problem}" for problem in deferral_problems(marks, marks.pop("state", {})))
+        marks["wall_ms"] = wall
+        samples["ui"].append(marks)
+        _, wall = launch(["--headless", "--list-steps", "--no-trace"])
+        samples["headless"].append({"wall_ms": wall})
+
+    results = {
+        case: {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+        for case, runs in samples.items()
+    }
+    print_table(results, ["imports", "qapplication", "window", "first_paint", "ready", "wall_ms"])
+
+    over = []
+    for case, budgets in BUDGET_MS.items():
+        for metric, budget in budgets.items():
+            limit = budget * args.budget_scale
+            if results[case][metric] > limit:
+                over.append(f"{case}: {metric} {results[case][metric]:.0f} ms > budget {limit:.0f} ms")
+    for message in over:
+        print(f"OVER BUDGET {message}")
+    for message in deferral:
+        print(f"NOT DEFERRED {message}")
+    return 1 if over or deferral else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Shared helpers for the benchmark scripts: loading the optimizer modules and baselines"""
+import importlib.util
+import json
+import os
+import platform
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def load_optimizer():
+    """Import the Qt-free optimizer_core module (worker, cleanup and registry engines)"""
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    import optimizer_core
+    return optimizer_core
+
+
+def load_app():
+    """Import 23.py (not importable by name), the PyQt6 UI, as the module `optimizer23`"""
+    if "optimizer23" in sys.modules:
+        return sys.modules["optimizer23"]
+    load_optimizer()
+    spec = importlib.util.spec_from_file_location("optimizer23", os.path.join(REPO_DIR, "23.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["optimizer23"] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}_{platform.system().lower()}.json")
+
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results},
+                  f, indent=2, sort_keys=True)
+        f.write("\n")
+    return path
+
+
+def compare_baseline(name, results, directions, tolerance):
+    """Regressions of results against the stored baseline
+
+    results is {case: {metric: value}}; directions maps a metric to
+    ("higher" or "lower", noise), giving which way is better and an absolute
+    change too small to matter. A metric regresses when it is worse than the
+    baseline by more than tolerance (a fraction) and by more than noise.
+    Boolean metrics must simply stay True. Returns (found_baseline, [message, ...]).
+    """
+    try:
+        with open(baseline_path(name), "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return False, []
+
+    regressions = []
+    for case, metrics in results.items():
+        for metric, value in metrics.items():
+            if isinstance(value, bool):
+                if not value:
+                    regressions.append(f"{case}: {metric} failed")
+                continue
+            expected = baseline.get(case, {}).get(metric)
+            if expected is None or metric not in directions:
+                continue
+            direction, noise = directions[metric]
+            worse_by = expected - value if direction == "higher" else value - expected
+            if worse_by > max(noise, abs(expected) * tolerance):
+                relation = "<" if direction == "higher" else ">"
+                regressions.append(f"{case}: {metric} {value:.4g} {relation} baseline {expected:.4g}")
+    return True, regressions
+
+
+def print_table(results, columns):
+    """Print {case: {metric: value}} as a fixed-width table of the given metric columns"""
+    width = max([len("case")] + [len(case) for case in results]) + 2
+    print("case".ljust(width) + "".join(column.rjust(16) for column in columns))
+    for case, metrics in results.items():
+        cells = []
+        for column in columns:
+            value = metrics.get(column, "")
+            cells.append((f"{value:.4g}" if isinstance(value, float) else str(value)).rjust(16))
+        print(case.ljust(width) + "".join(cells))
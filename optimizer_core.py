@@ -0,0 +1,3002 @@
+"""Qt-free core of 23 Optimizer: registry, cleanup, scheduling and the worker
+
+23.py builds the PyQt6 UI on top of this module. Scripted runs use
+`python 23.py --headless` (or this module directly), which never imports Qt:
+
+  python optimizer_core.py --list-steps
+  python optimizer_core.py --steps clear_temp flush_dns
+  python optimizer_core.py --analyze
+  python optimizer_core.py --undo
+  python optimizer_core.py --timeouts
+
+Progress and results are written to stdout as one JSON object per line.
+"""
+import sys, os, ctypes, subprocess, shutil, time, queue, uuid, stat, re, fnmatch, glob, json, hashlib, platform, argparse, signal
+try:
+    import winreg
+except ImportError:
+    # Off Windows, SafeRegistry needs a backend such as MemoryRegistryBackend
+    winreg = None
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11: only JSON cleanup rule packs load
+    tomllib = None
+from threading import Thread, Lock, Condition, BoundedSemaphore, current_thread, get_native_id
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+
+APP_NAME = "23 Optimizer"
+VERSION = "V 2.0"
+
+SAFE_MODE = True
+# Record every step and operation of a run; written to last_run_trace.json(l)
+TRACE_EXECUTION = True
+# Changes are journaled for "Undo last run"; a system restore point is opt-in
+CREATE_RESTORE_POINT = False
+
+def app_data_dir():
+    """Per-user folder for the optimizer's caches"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "23Optimizer")
+
+# Parallel subtree walkers used by the deletion engine
+DELETE_WORKERS = 4
+
+# Low-impact cleanup throttles deletes and runs them at background priority;
+# None turns it on for HDD systems only
+LOW_IMPACT_CLEANUP = None
+LOW_IMPACT_OPS_PER_S = 500
+LOW_IMPACT_BYTES_PER_S = 32 * 1024 * 1024
+# Average delete latency above which the rate is cut (a busy HDD takes tens of ms)
+LOW_IMPACT_TARGET_LATENCY = 0.02
+
+# Max steps running at once, by hardware tier from build_ai_profile
+TIER_CONCURRENCY = {
+    "Elite": 6,
+    "Balanced": 4,
+    "Lite": 2
+}
+
+# Most progress snapshots per second sent from the worker to the UI
+PROGRESS_RATE_HZ = 30
+
+# ===============================
+# ADMIN CHECK
+# ===============================
+def is_admin():
+    try:
+        return ctypes.windll.shell32.IsUserAnAdmin()
+    except:
+        return False
+
+# ===============================
+# CANCELLATION
+# ===============================
+class Cancelled(Exception):
+    """Raised inside a step once the run has been cancelled"""
+
+class CancelToken:
+    """Cooperative stop/pause flag shared by the worker, its steps and the engines
+
+    Loops call wait_if_paused() (or check() where raising is simpler), which
+    costs one attribute read unless a pause or cancel is pending. cancel()
+    also runs the registered callbacks, which kill running child processes.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+        self.paused = False
+        self.cancelled_at = None
+        self._callbacks = []
+        self._cond = Condition()
+
+    def cancel(self):
+        with self._cond:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            self.cancelled_at = time.monotonic()
+            callbacks = list(self._callbacks)
+            self._cond.notify_all()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback error: {e}")
+
+    def pause(self):
+        with self._cond:
+            self.paused = True
+
+    def resume(self):
+        with self._cond:
+            self.paused = False
+            self._cond.notify_all()
+
+    def on_cancel(self, callback):
+        with self._cond:
+            self._callbacks.append(callback)
+            cancelled = self.cancelled
+        if cancelled:
+            callback()
+
+    def wait_if_paused(self):
+        """Block while paused; False once cancelled, meaning stop now"""
+        if not (self.paused or self.cancelled):
+            return True
+        with self._cond:
+            while self.paused and not self.cancelled:
+                self._cond.wait()
+            return not self.cancelled
+
+    def check(self):
+        if not self.wait_if_paused():
+            raise Cancelled()
+
+    def sleep(self, seconds):
+        """time.sleep that returns early on cancel"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.cancelled, seconds)
+
+# ===============================
+# SAFE REGISTRY OPERATIONS
+# ===============================
+REG_SZ = winreg.REG_SZ if winreg else 1
+REG_DWORD = winreg.REG_DWORD if winreg else 4
+
+# Where Windows keeps the state that configuration steps change
+SERVICES_KEY = r"HKLM\SYSTEM\CurrentControlSet\Services"
+POWER_SCHEMES_KEY = r"HKLM\SYSTEM\CurrentControlSet\Control\Power\User\PowerSchemes"
+FILESYSTEM_KEY = r"HKLM\SYSTEM\CurrentControlSet\Control\FileSystem"
+SERVICE_START_TYPES = {"auto": 2, "demand": 3, "disabled": 4}
+# `sc config start=` names for every Start value, used when undoing
+SERVICE_START_NAMES = {0: "boot", 1: "system", 2: "auto", 3: "demand", 4: "disabled"}
+# Registry values behind the `fsutil behavior set` settings the optimizer changes
+FSUTIL_SETTINGS = {
+    "disablelastaccess": "NtfsDisableLastAccessUpdate",
+    "memoryusage": "NtfsMemoryUsage",
+    "mftzone": "NtfsMftZoneReservation",
+    "DisableDeleteNotify": "DisableDeleteNotification"
+}
+HIGH_PERFORMANCE_SCHEME = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
+
+REGISTRY_HIVES = {
+    "HKCU": "HKEY_CURRENT_USER",
+    "HKLM": "HKEY_LOCAL_MACHINE",
+    "HKCR": "HKEY_CLASSES_ROOT",
+    "HKU": "HKEY_USERS"
+}
+
+class WinRegBackend:
+    """Registry access through winreg (64-bit view)"""
+
+    def open_key(self, hive, sub_key, write=False, create=False):
+        access = winreg.KEY_READ | winreg.KEY_WOW64_64KEY
+        if write:
+            access |= winreg.KEY_SET_VALUE
+        root_key = getattr(winreg, hive)
+        if create:
+            return winreg.CreateKeyEx(root_key, sub_key, 0, access)
+        return winreg.OpenKey(root_key, sub_key, 0, access)
+
+    def query_value(self, key, value_name):
+        return winreg.QueryValueEx(key, value_name)
+
+    def set_value(self, key, value_name, value, value_type):
+        winreg.SetValueEx(key, value_name, 0, value_type, value)
+
+    def delete_value(self, key, value_name):
+        winreg.DeleteValue(key, value_name)
+
+    def close_key(self, key):
+        winreg.CloseKey(key)
+
+class MemoryRegistryBackend:
+    """In-memory registry so registry code can be tested and benchmarked off Windows"""
+
+    def __init__(self):
+        self.keys = {}
+        self.opens = 0
+        self._lock = Lock()
+
+    def open_key(self, hive, sub_key, write=False, create=False):
+        handle = (hive, sub_key.lower())
+        with self._lock:
+            if handle not in self.keys:
+                if not create:
+                    raise FileNotFoundError(f"{hive}\\{sub_key}")
+                self.keys[handle] = {}
+            self.opens += 1
+        return handle
+
+    def query_value(self, key, value_name):
+        values = self.keys[key]
+        if value_name not in values:
+            raise FileNotFoundError(value_name)
+        return values[value_name]
+
+    def set_value(self, key, value_name, value, value_type):
+        self.keys[key][value_name] = (value, value_type)
+
+    def delete_value(self, key, value_name):
+        if self.keys[key].pop(value_name, None) is None:
+            raise FileNotFoundError(value_name)
+
+    def close_key(self, key):
+        pass
+
+class SafeRegistry:
+    backend = WinRegBackend() if winreg else None
+
+    @staticmethod
+    def split_path(key_path):
+        """Split 'HKCU\\Sub\\Key' into a full hive name and subkey"""
+        hive, sub_key = key_path.split('\\', 1)
+        return REGISTRY_HIVES.get(hive.upper(), hive), sub_key
+
+    @classmethod
+    def set_value(cls, key_path, value_name, value, value_type=REG_DWORD):
+        """Safely set registry value with error handling"""
+        try:
+            hive, sub_key = cls.split_path(key_path)
+            key = cls.backend.open_key(hive, sub_key, write=True)
+            try:
+                cls.backend.set_value(key, value_name, value, value_type)
+            finally:
+                cls.backend.close_key(key)
+            return True
+        except Exception as e:
+            print(f"Registry error: {e}")
+            return False
+    
+    @classmethod
+    def backup_value(cls, key_path, value_name):
+        """Backup a registry value before modifying"""
+        value, _ = cls.read_value(key_path, value_name)
+        return value
+
+    @classmethod
+    def read_value(cls, key_path, value_name):
+        """(value, value_type), or (None, None) if the key or value is missing"""
+        try:
+            hive, sub_key = cls.split_path(key_path)
+            key = cls.backend.open_key(hive, sub_key)
+            try:
+                return cls.backend.query_value(key, value_name)
+            finally:
+                cls.backend.close_key(key)
+        except:
+            return None, None
+
+    @classmethod
+    def backup_values(cls, values):
+        """Read many (key_path, value_name) pairs, opening each key once; missing values are None"""
+        groups = {}
+        for key_path, value_name in values:
+            hive, sub_key = cls.split_path(key_path)
+            group = groups.setdefault((hive, sub_key.lower()), (hive, sub_key, []))
+            group[2].append((key_path, value_name))
+
+        results = {}
+        for hive, sub_key, names in groups.values():
+            try:
+                key = cls.backend.open_key(hive, sub_key)
+            except:
+                results.update((name, None) for name in names)
+                continue
+            try:
+                for key_path, value_name in names:
+                    try:
+                        results[(key_path, value_name)] = cls.backend.query_value(key, value_name)[0]
+                    except:
+                        results[(key_path, value_name)] = None
+            finally:
+                cls.backend.close_key(key)
+        return results
+
+class RegistryBatch:
+    """Collects registry writes and applies them with one key handle per subkey
+
+    With a journal, each value's previous contents are read through the same
+    handle and recorded just before it is overwritten.
+    """
+
+    def __init__(self, backend=None, journal=None):
+        self.backend = backend or SafeRegistry.backend
+        self.journal = journal
+        self.writes = []
+
+    def set(self, key_path, value_name, value, value_type=REG_DWORD):
+        self.writes.append((key_path, value_name, value, value_type))
+        return self
+
+    def delete(self, key_path, value_name):
+        """Queue removal of a value (a missing value counts as removed)"""
+        self.writes.append((key_path, value_name, None, None))
+        return self
+
+    def apply(self):
+        """Write every queued value; returns [(key_path, value_name, success), ...] in queue order"""
+        groups = {}
+        for index, (key_path, _, _, _) in enumerate(self.writes):
+            hive, sub_key = SafeRegistry.split_path(key_path)
+            group = groups.setdefault((hive, sub_key.lower()), (hive, sub_key, []))
+            group[2].append(index)
+
+        results = [False] * len(self.writes)
+        for hive, sub_key, indexes in groups.values():
+            try:
+                # Like `reg add`, create the key if it does not exist yet
+                key = self.backend.open_key(hive, sub_key, write=True, create=True)
+            except Exception as e:
+                print(f"Registry error: {e}")
+                continue
+            try:
+                for index in indexes:
+                    key_path, value_name, value, value_type = self.writes[index]
+                    try:
+                        if self.journal:
+                            self._journal_previous(key, key_path, value_name)
+                        if value_type is None:
+                            try:
+                                self.backend.delete_value(key, value_name)
+                            except FileNotFoundError:
+                                pass
+                        else:
+                            self.backend.set_value(key, value_name, value, value_type)
+                        results[index] = True
+                    except Exception as e:
+                        print(f"Registry error: {e}")
+            finally:
+                self.backend.close_key(key)
+
+        return [(write[0], write[1], ok) for write, ok in zip(self.writes, results)]
+
+    def _journal_previous(self, key, key_path, value_name):
+        try:
+            previous, previous_type = self.backend.query_value(key, value_name)
+        except FileNotFoundError:
+            previous, previous_type = None, None
+        self.journal.record("reg", key=key_path, name=value_name, prev=previous, type=previous_type)
+
+# ===============================
+# CHANGE JOURNAL
+# ===============================
+class ChangeJournal:
+    """Append-only JSON-lines log of the values each run overwrote
+
+    Every line carries the id of the run that wrote it. A run starts with a
+    "begin" line, then one line per change holding the previous value,
+    written before the change is made so an interrupted run can still be
+    undone. Undoing a run replays its lines in reverse and appends an
+    "undone" line so the same run is not undone twice.
+    """
+
+    # Older runs are dropped once the file grows past this size
+    MAX_BYTES = 256 * 1024
+    KEEP_RUNS = 10
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), "change_journal.jsonl")
+        self.run_id = None
+        self._file = None
+        self._lock = Lock()
+
+    def begin(self):
+        """Start a new run; changes recorded before this are not journaled"""
+        self._compact()
+        self.run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        self._append({"run": self.run_id, "event": "begin", "time": int(time.time())})
+        return self.run_id
+
+    def record(self, kind, **change):
+        """Journal the previous state of one setting: kind plus what undo needs to restore it"""
+        if self.run_id is None:
+            return
+        previous = change.get("prev")
+        if isinstance(previous, bytes):
+            change["prev"] = {"hex": previous.hex()}
+        self._append({"run": self.run_id, "kind": kind, **change})
+
+    def last_run(self):
+        """(run_id, changes) for the newest run that changed something and was not undone"""
+        runs, undone = {}, set()
+        for entry in self._read():
+            run_id = entry.get("run")
+            if entry.get("event") == "undone":
+                undone.add(run_id)
+            elif "kind" in entry:
+                runs.setdefault(run_id, []).append(entry)
+        for run_id in reversed(list(runs)):
+            if run_id not in undone:
+                return run_id, runs[run_id]
+        return None, []
+
+    def mark_undone(self, run_id):
+        self._append({"run": run_id, "event": "undone", "time": int(time.time())})
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def _append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line)
+                self._file.flush()
+            except Exception as e:
+                print(f"Journal error: {e}")
+
+    def _read(self):
+        entries = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A torn final line from a crash mid-write
+                        pass
+        except OSError:
+            pass
+        return entries
+
+    def _compact(self):
+        try:
+            if os.path.getsize(self.path) <= self.MAX_BYTES:
+                return
+        except OSError:
+            return
+        self.close()
+        entries = self._read()
+        keep = set(list(dict.fromkeys(entry.get("run") for entry in entries))[-self.KEEP_RUNS:])
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    if entry.get("run") in keep:
+                        f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Journal error: {e}")
+
+# ===============================
+# DELETION ENGINE
+# ===============================
+FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+class PatternMatcher:
+    """All glob patterns for one directory compiled into a single case-insensitive regex"""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        alternatives = "|".join(
+            f"(?P<r{index}>{fnmatch.translate(pattern)})" for index, pattern in enumerate(self.patterns)
+        )
+        self._regex = re.compile(alternatives, re.IGNORECASE)
+
+    def match(self, name):
+        """Index of the first pattern matching name, or None"""
+        found = self._regex.match(name)
+        return int(found.lastgroup[1:]) if found else None
+
+@lru_cache(maxsize=64)
+def compile_patterns(patterns):
+    return PatternMatcher(patterns)
+
+def _is_link(entry):
+    """Symlinks and Windows junctions are removed themselves, never walked into"""
+    if entry.is_symlink():
+        return True
+    attributes = getattr(entry.stat(follow_symlinks=False), "st_file_attributes", 0)
+    return bool(attributes & FILE_ATTRIBUTE_REPARSE_POINT)
+
+class _DeleteJob:
+    """Running totals and outstanding subtree tasks for one DeletionEngine.delete call"""
+
+    def __init__(self, label, rule_count, progress, interval, cutoffs=None):
+        self.label = label
+        self.bytes = 0
+        self.files = 0
+        self.rule_bytes = [0] * rule_count
+        self.rule_files = [0] * rule_count
+        # Per rule: files modified after this time are kept (None keeps nothing)
+        self.cutoffs = cutoffs or [None] * rule_count
+        self.dirs = []
+        self._progress = progress
+        self._interval = interval
+        self._last_report = time.monotonic()
+        self._pending = 0
+        self._cond = Condition()
+
+    def add(self, size, rule):
+        report = None
+        with self._cond:
+            self.bytes += size
+            self.files += 1
+            self.rule_bytes[rule] += size
+            self.rule_files[rule] += 1
+            now = time.monotonic()
+            if self._progress and now - self._last_report >= self._interval:
+                self._last_report = now
+                report = (self.files, self.bytes)
+        if report:
+            self._progress(self.label, *report)
+
+    def task_started(self):
+        with self._cond:
+            self._pending += 1
+
+    def task_finished(self):
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def wait(self):
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+
+THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+THREAD_MODE_BACKGROUND_END = 0x00020000
+
+def set_background_priority(enabled):
+    """Move the calling thread into (or out of) background priority; True when applied
+
+    Windows background mode lowers both CPU and I/O priority and can be
+    left again. Elsewhere the thread is reniced to 10, which the CFQ/BFQ
+    I/O schedulers follow too; that cannot be undone without privileges,
+    so enabled=False is a no-op there and only threads owned by the
+    caller (never a shared scheduler thread) should be lowered.
+    """
+    try:
+        if os.name == "nt":
+            kernel32 = ctypes.windll.kernel32
+            mode = THREAD_MODE_BACKGROUND_BEGIN if enabled else THREAD_MODE_BACKGROUND_END
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), mode))
+        if enabled:
+            # Linux applies a thread id's nice value to that thread only
+            os.setpriority(os.PRIO_PROCESS, get_native_id(), max(10, os.getpriority(os.PRIO_PROCESS, 0)))
+            return True
+    except Exception:
+        pass
+    return False
+
+class IoThrottle:
+    """Token buckets on delete operations and bytes, with the rate adapted to delete latency
+
+    acquire(size) reserves one operation and its bytes, sleeping until the
+    buckets cover them; a file bigger than the bucket runs it into debt
+    that later deletes wait off. observe(seconds) takes the measured time
+    of each delete. Every adjust_interval the rate is halved while the
+    average is over target_latency and grows back by a tenth of the
+    ceiling while under it, never below min_fraction of the ceilings.
+    """
+
+    def __init__(self, ops_per_s=LOW_IMPACT_OPS_PER_S, bytes_per_s=LOW_IMPACT_BYTES_PER_S,
+                 target_latency=LOW_IMPACT_TARGET_LATENCY, min_fraction=0.05, adjust_interval=0.25,
+                 burst=0.1, low_priority=True, cancel=None):
+        self.max_ops = ops_per_s
+        self.max_bytes = bytes_per_s
+        self.target_latency = target_latency
+        self.min_fraction = min_fraction
+        self.adjust_interval = adjust_interval
+        # Seconds of deletes that may run back to back
+        self.burst = burst
+        self.low_priority = low_priority
+        self.cancel = cancel or CancelToken()
+        # Current rate as a fraction of the ceilings
+        self.fraction = 1.0
+        self.decreases = 0
+        self.waited = 0.0
+        now = time.monotonic()
+        self._ops = ops_per_s * burst
+        self._bytes = bytes_per_s * burst
+        self._updated = now
+        self._adjusted = now
+        self._latency_sum = 0.0
+        self._latency_count = 0
+        self._lock = Lock()
+
+    def rates(self):
+        """Current (ops/s, bytes/s)"""
+        return self.max_ops * self.fraction, self.max_bytes * self.fraction
+
+    def acquire(self, size=0):
+        with self._lock:
+            now = time.monotonic()
+            ops_rate, bytes_rate = self.rates()
+            elapsed, self._updated = now - self._updated, now
+            self._ops = min(max(1.0, ops_rate * self.burst), self._ops + elapsed * ops_rate) - 1
+            self._bytes = min(bytes_rate * self.burst, self._bytes + elapsed * bytes_rate) - size
+            delay = max(0.0, -self._ops / ops_rate, -self._bytes / bytes_rate)
+            self.waited += delay
+        if delay:
+            self.cancel.sleep(delay)
+
+    def observe(self, seconds):
+        with self._lock:
+            self._latency_sum += seconds
+            self._latency_count += 1
+            now = time.monotonic()
+            if now - self._adjusted < self.adjust_interval:
+                return
+            average = self._latency_sum / self._latency_count
+            self._latency_sum, self._latency_count, self._adjusted = 0.0, 0, now
+            if average > self.target_latency:
+                self.fraction = max(self.min_fraction, self.fraction / 2)
+                self.decreases += 1
+            else:
+                self.fraction = min(1.0, self.fraction + 0.1)
+
+class DeletionEngine:
+    """Streams entries with os.scandir and removes subtrees on a bounded worker pool
+
+    With a throttle (an IoThrottle) set, every delete waits for its tokens
+    and reports its latency, and the whole walk moves onto the engine's own
+    threads at background priority, leaving the caller's thread untouched.
+    """
+
+    def __init__(self, max_workers=DELETE_WORKERS, progress=None, progress_interval=0.25, cancel=None):
+        self.progress = progress
+        self.progress_interval = progress_interval
+        # A cancelled sweep stops walking and reports what it removed so far
+        self.cancel = cancel or CancelToken()
+        self.throttle = None
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="delete")
+        # Top-level walks of throttled sweeps; kept apart from _pool so a walk
+        # waiting on its subtrees never holds a thread they need
+        self._walkers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="delete-walk")
+        self._slots = BoundedSemaphore(max_workers)
+
+    def delete(self, path, pattern="*"):
+        """Delete entries of path matching pattern; returns (bytes_freed, files_removed)"""
+        return self.sweep(path, (pattern,))[0]
+
+    def sweep(self, path, patterns):
+        """Delete entries matching any of patterns in a single scan of path
+
+        A pattern is a glob, or a (glob, min_age_seconds, recurse) tuple:
+        files younger than min_age are kept, and a non-recursive rule leaves
+        subfolders alone. Returns [(bytes_freed, files_removed), ...] per
+        pattern; an entry is credited to the first pattern it matches.
+        """
+        if self._low_priority():
+            return self._walkers.submit(self._at_background_priority, self._sweep, path, patterns).result()
+        return self._sweep(path, patterns)
+
+    def _low_priority(self):
+        return self.throttle is not None and self.throttle.low_priority
+
+    @staticmethod
+    def _at_background_priority(func, *args):
+        background = set_background_priority(True)
+        try:
+            return func(*args)
+        finally:
+            if background:
+                set_background_priority(False)
+
+    def _sweep(self, path, patterns):
+        rules = [(rule, 0, True) if isinstance(rule, str) else tuple(rule) for rule in patterns]
+        matcher = compile_patterns(tuple(pattern for pattern, _, _ in rules))
+        label = os.path.basename(path.rstrip("\\/")) or path
+        now = time.time()
+        job = _DeleteJob(label, len(rules), self.progress, self.progress_interval,
+                         [now - min_age if min_age else None for _, min_age, _ in rules])
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rule = matcher.match(entry.name)
+                    if rule is None:
+                        continue
+                    if not self.cancel.wait_if_paused():
+                        break
+                    try:
+                        if entry.is_dir(follow_symlinks=False) and not _is_link(entry):
+                            if not rules[rule][2]:
+                                continue
+                            if not self._submit(entry.path, job, rule):
+                                job.task_started()
+                                self._remove_tree(entry.path, job, rule)
+                        else:
+                            self._remove_entry(entry, job, rule)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+
+        job.wait()
+        # A child path is always longer than its parent, so this removes leaves first
+        for directory in sorted(job.dirs, key=len, reverse=True):
+            if self.throttle:
+                self.throttle.acquire()
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        if self.progress and job.files:
+            self.progress(job.label, job.files, job.bytes)
+        return list(zip(job.rule_bytes, job.rule_files))
+
+    def _submit(self, path, job, rule):
+        # Only hand a subtree to a worker that is idle right now; otherwise the
+        # caller walks it itself, so queued work and memory stay bounded
+        if not self._slots.acquire(blocking=False):
+            return False
+        job.task_started()
+        self._pool.submit(self._run_task, path, job, rule)
+        return True
+
+    def _run_task(self, path, job, rule):
+        try:
+            if self._low_priority():
+                self._at_background_priority(self._remove_tree, path, job, rule)
+            else:
+                self._remove_tree(path, job, rule)
+        finally:
+            self._slots.release()
+
+    def _remove_tree(self, root, job, rule):
+        stack = [root]
+        try:
+            while stack and self.cancel.wait_if_paused():
+                current = stack.pop()
+                job.dirs.append(current)
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            if not self.cancel.wait_if_paused():
+                                break
+                            try:
+                                if entry.is_dir(follow_symlinks=False) and not _is_link(entry):
+                                    if not self._submit(entry.path, job, rule):
+                                        stack.append(entry.path)
+                                else:
+                                    self._remove_entry(entry, job, rule)
+                            except OSError:
+                                pass
+                except OSError:
+                    pass
+        finally:
+            job.task_finished()
+
+    def _remove_entry(self, entry, job, rule):
+        # DirEntry caches the stat data from the directory read on Windows,
+        # so sizing a file costs no extra syscall there
+        info = entry.stat(follow_symlinks=False)
+        cutoff = job.cutoffs[rule]
+        if cutoff is not None and info.st_mtime > cutoff:
+            return
+        size = info.st_size
+        throttle = self.throttle
+        if throttle:
+            throttle.acquire(size)
+            started = time.perf_counter()
+        try:
+            os.unlink(entry.path)
+        except PermissionError:
+            if entry.is_dir(follow_symlinks=False):
+                # Directory junction: remove the link, not its target
+                os.rmdir(entry.path)
+            else:
+                os.chmod(entry.path, stat.S_IWRITE)
+                os.unlink(entry.path)
+        if throttle:
+            throttle.observe(time.perf_counter() - started)
+        job.add(size, rule)
+
+    def close(self):
+        self._walkers.shutdown(wait=True)
+        self._pool.shutdown(wait=True)
+
+# ===============================
+# CLEANUP SPACE INDEX
+# ===============================
+class DirectoryIndex:
+    """Persistent per-directory size index for read-only cleanup estimates
+
+    Each directory is stored with its mtime, entry count, direct file
+    bytes/count and subdirectory names. A directory whose mtime is unchanged
+    is not re-listed, so a warm estimate costs one stat per directory
+    instead of one per file. Files rewritten in place without adding or
+    removing entries do not bump the folder mtime and keep their old size
+    until the folder changes.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), "scan_index.json")
+        self.rescanned = 0
+        self._entries = {}
+        self._seen = {}
+        self._lock = Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self._entries = data.get("dirs", {})
+        except:
+            pass
+
+    def measure(self, path, pattern="*"):
+        """Bytes and file count a sweep of path with pattern would remove"""
+        matcher = compile_patterns((pattern,))
+        total_bytes, total_files = 0, 0
+        stack = [(path, matcher if pattern != "*" else None)]
+        while stack:
+            directory, match = stack.pop()
+            entry = self._directory_entry(directory, pattern if match else "*", match)
+            if entry is None:
+                continue
+            _, _, file_bytes, file_count, subdirs = entry
+            total_bytes += file_bytes
+            total_files += file_count
+            stack.extend((os.path.join(directory, name), None) for name in subdirs)
+        return total_bytes, total_files
+
+    def _directory_entry(self, directory, pattern, matcher):
+        key = f"{os.path.normcase(os.path.abspath(directory))}|{pattern}"
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        entry = self._entries.get(key)
+        rescanned = entry is None or entry[0] != mtime
+        if rescanned:
+            entry = self._scan(directory, mtime, matcher)
+            if entry is None:
+                return None
+        with self._lock:
+            self._seen[key] = entry
+            self.rescanned += rescanned
+        return entry
+
+    @staticmethod
+    def _scan(directory, mtime, matcher):
+        entries, file_bytes, file_count, subdirs = 0, 0, 0, []
+        try:
+            with os.scandir(directory) as listing:
+                for item in listing:
+                    entries += 1
+                    if matcher and matcher.match(item.name) is None:
+                        continue
+                    try:
+                        if item.is_dir(follow_symlinks=False) and not _is_link(item):
+                            subdirs.append(item.name)
+                        else:
+                            file_bytes += item.stat(follow_symlinks=False).st_size
+                            file_count += 1
+                    except OSError:
+                        pass
+        except OSError:
+            return None
+        return [mtime, entries, file_bytes, file_count, subdirs]
+
+    def save(self):
+        """Persist the directories visited since loading; unvisited ones are dropped"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "dirs": self._seen}, f, separators=(",", ":"))
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            print(f"Index save error: {e}")
+
+# ===============================
+# CLEANUP RULE PACKS
+# ===============================
+# Shipped rules; packs dropped into <app data>/rules (*.json, or *.toml on
+# Python 3.11+) add locations without a code change
+BUILTIN_RULE_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cleanup_rules.json")
+
+def rule_pack_paths():
+    """The built-in pack followed by the user's packs in name order"""
+    paths = [BUILTIN_RULE_PACK]
+    directory = os.path.join(app_data_dir(), "rules")
+    try:
+        paths += sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                        if name.lower().endswith((".json", ".toml")))
+    except OSError:
+        pass
+    return paths
+
+class CleanupRule:
+    """One rule: a folder template (%VAR% and * allowed) and what to delete inside it
+
+    Pack fields: step, path, pattern (a glob or a list, default "*"),
+    min_age_hours (newer files are kept), recurse (false leaves subfolders
+    alone) and services (stopped while the step deletes). A pack may also
+    declare "steps" ({name: {title, status, safe}}) for steps that have no
+    built-in clear_* method, and "defaults" for unset %VARIABLES%.
+    """
+    __slots__ = ("step", "path", "patterns", "min_age", "recurse", "services", "pack")
+
+    def __init__(self, step, path, patterns=("*",), min_age=0, recurse=True, services=(), pack=""):
+        self.step = step
+        self.path = path
+        self.patterns = patterns
+        self.min_age = min_age
+        self.recurse = recurse
+        self.services = services
+        self.pack = pack
+
+    @classmethod
+    def from_dict(cls, raw, pack=""):
+        step, path = raw.get("step"), raw.get("path")
+        if not isinstance(step, str) or not step.isidentifier() or not isinstance(path, str) or not path:
+            raise ValueError(f"rule needs a step name and a path: {raw}")
+        patterns = raw.get("pattern", "*")
+        return cls(
+            step, path,
+            patterns=(patterns,) if isinstance(patterns, str) else tuple(patterns),
+            min_age=float(raw.get("min_age_hours", 0)) * 3600,
+            recurse=bool(raw.get("recurse", True)),
+            services=tuple(raw.get("services", ())),
+            pack=pack
+        )
+
+class CleanupPlan:
+    """The rules of every pack, compiled once per set of pack contents
+
+    resolve() turns path templates into this machine's folders: %VAR%
+    expansion (pack defaults stand in for unset variables), an optional
+    remap, then glob expansion of wildcard folders such as browser
+    profiles. Targets are deduplicated by folder, and targets inside a
+    folder the same step already sweeps completely are dropped, so no
+    folder is walked twice for one step.
+    """
+
+    def __init__(self, rules, steps=None, defaults=None, digest=""):
+        self.rules = rules
+        # {step: {"title", "status", "safe"}} for steps only a pack defines
+        self.steps = steps or {}
+        self.defaults = defaults or {}
+        self.digest = digest
+        self._by_step = {}
+        for rule in rules:
+            self._by_step.setdefault(rule.step, []).append(rule)
+
+    def step_names(self):
+        return list(self._by_step)
+
+    def services(self, step):
+        """Services stopped around a step's deletions and started again afterwards"""
+        return list(dict.fromkeys(service for rule in self._by_step.get(step, ()) for service in rule.services))
+
+    def resources(self, step):
+        """Scheduler resources: each rule's folder up to its first wildcard, and its services"""
+        resources = []
+        for rule in self._by_step.get(step, ()):
+            parts = re.split(r"[\\/]", rule.path)
+            fixed = next((i for i, part in enumerate(parts) if any(c in part for c in "*?[")), len(parts))
+            resources.append("fs:" + "\\".join(parts[:fixed]))
+        resources += [f"svc:{service}" for service in self.services(step)]
+        return tuple(dict.fromkeys(resources))
+
+    def expand(self, template, remap=None):
+        """Folders a path template names on this machine; [] when a variable it uses is unset"""
+        missing = []
+
+        def variable(found):
+            value = os.environ.get(found.group(1)) or self.defaults.get(found.group(1))
+            if not value:
+                missing.append(found.group(1))
+            return value or ""
+
+        path = re.sub(r"%(\w+)%", variable, template)
+        if missing:
+            return []
+        if remap:
+            path = remap(path)
+        if os.sep != "\\":
+            path = path.replace("\\", os.sep)
+        if not any(c in path for c in "*?["):
+            return [path]
+        return sorted(found for found in glob.glob(path) if os.path.isdir(found))
+
+    def resolve(self, remap=None):
+        """{step: [(directory, pattern, min_age_seconds, recurse), ...]} for this machine"""
+        targets = {}
+        for step, rules in self._by_step.items():
+            found = {}
+            for rule in rules:
+                for directory in self.expand(rule.path, remap):
+                    key = os.path.normcase(os.path.abspath(directory))
+                    for pattern in rule.patterns:
+                        found.setdefault((key, pattern, rule.min_age, rule.recurse), directory)
+            full = [key for key, pattern, min_age, recurse in found if pattern == "*" and not min_age and recurse]
+            targets[step] = [
+                (directory, pattern, min_age, recurse)
+                for (key, pattern, min_age, recurse), directory in found.items()
+                if not any(key.startswith(root + os.sep) or
+                           (key == root and (pattern, min_age, recurse) != ("*", 0, True)) for root in full)
+            ]
+        return targets
+
+_PLAN_CACHE = {}
+
+def load_cleanup_plan(paths=None):
+    """CleanupPlan for the rule packs, reusing an earlier compile of identical pack contents"""
+    sources = []
+    for path in rule_pack_paths() if paths is None else paths:
+        try:
+            with open(path, "rb") as f:
+                sources.append((path, f.read()))
+        except OSError as e:
+            print(f"Rule pack error: {e}")
+    digest = hashlib.sha256(b"".join(
+        os.path.basename(path).encode("utf-8") + b"\0" + data + b"\0" for path, data in sources
+    )).hexdigest()
+    plan = _PLAN_CACHE.get(digest)
+    if plan is None:
+        plan = _PLAN_CACHE[digest] = compile_rule_packs(sources, digest)
+    return plan
+
+def compile_rule_packs(sources, digest=""):
+    """CleanupPlan from [(path, raw bytes)]; a pack with an invalid rule is skipped whole"""
+    rules, steps, defaults = [], {}, {}
+    for path, data in sources:
+        try:
+            if path.lower().endswith(".toml"):
+                if tomllib is None:
+                    raise ValueError("TOML rule packs need Python 3.11 or newer")
+                pack = tomllib.loads(data.decode("utf-8"))
+            else:
+                pack = json.loads(data.decode("utf-8"))
+            name = pack.get("name") or os.path.splitext(os.path.basename(path))[0]
+            pack_rules = [CleanupRule.from_dict(raw, name) for raw in pack.get("rules", [])]
+        except Exception as e:
+            print(f"Rule pack error in {os.path.basename(path)}: {e}")
+            continue
+        rules += pack_rules
+        for step, info in pack.get("steps", {}).items():
+            steps.setdefault(step, dict(info))
+        for variable, value in pack.get("defaults", {}).items():
+            defaults.setdefault(variable, value)
+    return CleanupPlan(rules, steps, defaults, digest)
+
+# ===============================
+# HARDWARE PROFILE CACHE
+# ===============================
+def boot_time():
+    """Approximate boot timestamp (to the minute), or 0 if unknown"""
+    try:
+        if os.name == "nt":
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetTickCount64.restype = ctypes.c_ulonglong
+            booted = time.time() - kernel32.GetTickCount64() / 1000
+        else:
+            with open("/proc/stat", "r") as f:
+                booted = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return int(booted // 60) * 60
+    except:
+        return 0
+
+def system_fingerprint():
+    """Changes whenever cached hardware facts may be stale: a reboot or a CPU count change"""
+    return {"boot": boot_time(), "cores": os.cpu_count() or 0}
+
+class HardwareProfileCache:
+    """On-disk cache for the slow hardware probes (GPU, RAM, disk media type)
+
+    get_system_info calls lookup() and, after probing, store(); probes can
+    be swapped for stand-ins through ProbeEngine.run().
+    """
+
+    def __init__(self, path=None, max_age=7 * 24 * 3600, fingerprint=None):
+        self.path = path or os.path.join(app_data_dir(), "hardware_profile.json")
+        self.max_age = max_age
+        self.fingerprint = fingerprint or system_fingerprint
+        self.hit = False
+        self.age = 0
+
+    def lookup(self):
+        """Cached info when the fingerprint matches and it is younger than max_age, else None"""
+        self.hit, self.age = False, 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except:
+            return None
+        age = time.time() - cached.get("created", 0)
+        if cached.get("fingerprint") != self.fingerprint() or not 0 <= age < self.max_age:
+            return None
+        self.hit, self.age = True, int(age)
+        return dict(cached["info"])
+
+    def store(self, info):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "fingerprint": self.fingerprint(), "info": info}, f)
+        except Exception as e:
+            print(f"Hardware cache error: {e}")
+
+# ===============================
+# SYSTEM PROBES
+# ===============================
+# Wall-clock budget for all probes together; late probes fall back to defaults
+ANALYSIS_DEADLINE = 6.0
+
+SYSTEM_PROBES = []
+
+class SystemProbe:
+    def __init__(self, name, func, defaults, cacheable=True):
+        self.name = name
+        self.func = func
+        self.defaults = defaults
+        self.cacheable = cacheable
+
+def system_probe(name, defaults, cacheable=True):
+    """Register func(timeout) -> dict as a system probe
+
+    defaults are used when the probe fails or misses the analysis deadline;
+    cacheable probes are stored in the hardware profile cache.
+    """
+    def register(func):
+        SYSTEM_PROBES.append(SystemProbe(name, func, defaults, cacheable))
+        return func
+    return register
+
+@system_probe("ram", {"ram": 8})
+def probe_ram(timeout):
+    mem = ctypes.c_ulonglong()
+    ctypes.windll.kernel32.GetPhysicallyInstalledSystemMemory(ctypes.byref(mem))
+    return {"ram": int(mem.value / (1024 * 1024))}  # Convert to GB
+
+@system_probe("gpu", {"gpu": "unknown"})
+def probe_gpu(timeout):
+    gpu_out = subprocess.run(
+        "wmic path win32_VideoController get name",
+        shell=True, capture_output=True, text=True, timeout=timeout
+    ).stdout.lower()
+
+    if "nvidia" in gpu_out:
+        return {"gpu": "nvidia"}
+    if "amd" in gpu_out or "radeon" in gpu_out:
+        return {"gpu": "amd"}
+    if "intel" in gpu_out:
+        return {"gpu": "intel"}
+    return {"gpu": "unknown"}
+
+@system_probe("disk_media", {"has_disk": False, "ssd": False, "hdd": False})
+def probe_disk_media(timeout):
+    # Disk type detection (SSD vs HDD + presence)
+    started = time.monotonic()
+    info = {"has_disk": False, "ssd": False, "hdd": False}
+    try:
+        drive_out = subprocess.run(
+            "wmic diskdrive get MediaType",
+            shell=True, capture_output=True, text=True, timeout=timeout
+        ).stdout.lower()
+
+        media_lines = [line.strip() for line in drive_out.splitlines() if line.strip() and "mediatype" not in line]
+        info["has_disk"] = len(media_lines) > 0
+        info["ssd"] = "ssd" in drive_out or "solid state" in drive_out
+        info["hdd"] = "hard disk" in drive_out or "hdd" in drive_out or "fixed hard disk" in drive_out
+    except subprocess.TimeoutExpired:
+        # Slow, not missing: report the timeout rather than guessing a disk
+        raise
+    except:
+        # Fallback: check if TRIM is enabled (SSD indicator)
+        try:
+            trim_out = subprocess.run(
+                "fsutil behavior query DisableDeleteNotify",
+                shell=True, capture_output=True, text=True,
+                timeout=max(0.1, timeout - (time.monotonic() - started))
+            ).stdout
+            info["ssd"] = "0" in trim_out
+            info["has_disk"] = True
+        except subprocess.TimeoutExpired:
+            raise
+        except:
+            info["ssd"] = False
+
+    if info["has_disk"] and not info["ssd"]:
+        info["hdd"] = True
+    return info
+
+@system_probe("cpu_model", {"cpu_model": "unknown"})
+def probe_cpu_model(timeout):
+    name = SafeRegistry.backup_value(
+        r"HKLM\HARDWARE\DESCRIPTION\System\CentralProcessor\0", "ProcessorNameString"
+    )
+    return {"cpu_model": (name or platform.processor() or "unknown").strip()}
+
+@system_probe("disk_free", {"disk_free": 0}, cacheable=False)
+def probe_disk_free(timeout):
+    return {"disk_free": int(shutil.disk_usage("C:\\").free / (1024 ** 3))}
+
+class ProbeEngine:
+    """Runs system probes concurrently under one global deadline"""
+
+    def __init__(self, deadline=ANALYSIS_DEADLINE, cancel=None, timeouts=None):
+        self.deadline = deadline
+        self.cancel = cancel or CancelToken()
+        # Optional TimeoutHistory: each probe gets its learned deadline within the global one
+        self.timeouts = timeouts
+        self.report = {}
+
+    def run(self, probes):
+        """Merged facts from all probes; report holds each probe's status ('ok', 'error', 'timeout') and ms"""
+        self.report = {}
+        if not probes:
+            return {}
+        started = time.monotonic()
+        finish_by = started + self.deadline
+        pool = ThreadPoolExecutor(max_workers=len(probes), thread_name_prefix="probe")
+        futures = {pool.submit(self._timed, probe, finish_by): probe for probe in probes}
+        # Short waits so a cancel does not sit out the whole deadline
+        while not self.cancel.cancelled:
+            remaining = finish_by - time.monotonic()
+            if remaining <= 0 or not wait(futures, timeout=min(remaining, 0.1)).not_done:
+                break
+        # Late probes keep running in the background until their own timeout,
+        # which never extends past the deadline; nobody waits for them
+        pool.shutdown(wait=False, cancel_futures=True)
+
+        info = {}
+        for future, probe in futures.items():
+            values = dict(probe.defaults)
+            if future.done():
+                found, elapsed, timed_out = future.result()
+                if found is not None:
+                    values.update(found)
+                status = "timeout" if timed_out else "ok" if found is not None else "error"
+            else:
+                elapsed, status = time.monotonic() - started, "timeout"
+            self.report[probe.name] = {"status": status, "ms": round(elapsed * 1000, 1)}
+            info.update(values)
+        return info
+
+    def _timed(self, probe, finish_by):
+        started = time.monotonic()
+        timeout = max(0.1, finish_by - started)
+        if self.timeouts:
+            timeout = min(timeout, self.timeouts.deadline(f"probe:{probe.name}", timeout))
+        timed_out = False
+        try:
+            found = probe.func(timeout)
+        except subprocess.TimeoutExpired:
+            found, timed_out = None, True
+        except Exception:
+            found = None
+        elapsed = time.monotonic() - started
+        if self.timeouts and (found is not None or timed_out):
+            self.timeouts.record(f"probe:{probe.name}", timeout if timed_out else elapsed, timed_out)
+        return found, elapsed, timed_out
+
+# ===============================
+# PERSISTENT COMMAND HOST
+# ===============================
+class CmdShellBackend:
+    """Frames commands for a long-lived cmd.exe session"""
+    argv = ["cmd.exe", "/D", "/Q"]
+
+    def frame(self, command, sentinel):
+        # stdin comes from NUL so a command can never swallow the next frame
+        return f"({command}) < NUL\necho {sentinel} %errorlevel%\n"
+
+class PosixShellBackend:
+    """Stand-in /bin/sh session so host pooling and framing run off Windows"""
+    argv = ["/bin/sh"]
+
+    def frame(self, command, sentinel):
+        return f"{{ {command}\n}} < /dev/null\necho {sentinel} $?\n"
+
+def default_shell_backend():
+    return CmdShellBackend() if os.name == "nt" else PosixShellBackend()
+
+def kill_process_tree(proc):
+    """Kill proc and everything it started (defrag, powershell, ...), not only the shell"""
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(proc.pid)], capture_output=True, timeout=5,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+        else:
+            # The host leads its own session, so its process group is the whole tree
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        proc.kill()
+
+class CommandHost:
+    """One persistent shell fed commands over stdin, with sentinel-delimited results"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or default_shell_backend()
+        self.spawns = 0
+        self._proc = None
+        self._lines = None
+        self._lock = Lock()
+
+    def alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def _spawn(self):
+        self._proc = subprocess.Popen(
+            self.backend.argv,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors="replace", bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            start_new_session=os.name != "nt"
+        )
+        self._lines = queue.Queue()
+        Thread(target=self._read_output, args=(self._proc.stdout, self._lines), daemon=True).start()
+        self.spawns += 1
+
+    @staticmethod
+    def _read_output(stream, lines):
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+
+    def _kill(self):
+        if self._proc is not None:
+            try:
+                kill_process_tree(self._proc)
+                self._proc.wait(timeout=2)
+            except:
+                pass
+        self._proc = None
+
+    def terminate(self):
+        """Kill the running command from another thread; its run() returns at once"""
+        proc = self._proc
+        if proc is not None:
+            kill_process_tree(proc)
+
+    def run(self, command, timeout=10):
+        """Run one command; returns CompletedProcess, raises TimeoutExpired after killing the host"""
+        with self._lock:
+            sentinel = f"__23OPT_{uuid.uuid4().hex}__"
+            for attempt in range(2):
+                if not self.alive():
+                    self._spawn()
+                try:
+                    self._proc.stdin.write(self.backend.frame(command, sentinel))
+                    self._proc.stdin.flush()
+                    break
+                except OSError:
+                    # Host died since the liveness check; respawn once and retry
+                    self._kill()
+                    if attempt:
+                        raise
+
+            lines = self._lines
+            output = []
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._kill()
+                    raise subprocess.TimeoutExpired(command, timeout, output="".join(output))
+                try:
+                    line = lines.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    # The command took the host down with it; next run respawns
+                    returncode = self._proc.wait()
+                    self._proc = None
+                    return subprocess.CompletedProcess(command, returncode, stdout="".join(output))
+                # Output without a trailing newline puts the sentinel mid-line
+                found = line.find(sentinel)
+                if found >= 0:
+                    output.append(line[:found])
+                    code = line[found + len(sentinel):].strip()
+                    returncode = int(code) if code.lstrip("-").isdigit() else -1
+                    return subprocess.CompletedProcess(command, returncode, stdout="".join(output))
+                output.append(line)
+
+    def close(self):
+        with self._lock:
+            if self.alive():
+                try:
+                    self._proc.stdin.write("exit\n")
+                    self._proc.stdin.flush()
+                    self._proc.wait(timeout=2)
+                except:
+                    pass
+            self._kill()
+
+class CommandHostPool:
+    """A few persistent command hosts shared by concurrently running steps"""
+
+    def __init__(self, size=1, backend=None):
+        self._hosts = [CommandHost(backend) for _ in range(max(1, size))]
+        self._idle = queue.Queue()
+        for host in self._hosts:
+            self._idle.put(host)
+
+    def run(self, command, timeout=10):
+        host = self._idle.get()
+        try:
+            return host.run(command, timeout)
+        finally:
+            self._idle.put(host)
+
+    def terminate(self):
+        for host in self._hosts:
+            host.terminate()
+
+    def close(self):
+        for host in self._hosts:
+            host.close()
+
+# ===============================
+# ADAPTIVE TIMEOUTS
+# ===============================
+# Learned deadline = p99 of recent durations x margin, clamped to [floor, ceiling]
+TIMEOUT_MARGIN = 1.5
+TIMEOUT_FLOOR = 2.0
+TIMEOUT_CEILING = 900.0
+# Until a command has this many samples its hard-coded timeout is kept as a minimum
+TIMEOUT_MIN_SAMPLES = 5
+TIMEOUT_WINDOW = 50
+
+class TimeoutHistory:
+    """Durations of commands, probes and steps across runs, and the deadlines learned from them
+
+    Keys are 'command:<text>', 'probe:<name>' and 'step:<name>'. A
+    command killed at its deadline is recorded at that deadline, so a
+    machine where it keeps timing out pushes the next deadline up by the
+    margin each run, up to the ceiling.
+    """
+
+    def __init__(self, path=None, margin=TIMEOUT_MARGIN, floor=TIMEOUT_FLOOR, ceiling=TIMEOUT_CEILING,
+                 min_samples=TIMEOUT_MIN_SAMPLES, window=TIMEOUT_WINDOW):
+        self.path = path or os.path.join(app_data_dir(), "step_timings.json")
+        self.margin = margin
+        self.floor = floor
+        self.ceiling = ceiling
+        self.min_samples = min_samples
+        self.window = window
+        self._entries = None
+        self._lock = Lock()
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)["entries"]
+            except:
+                self._entries = {}
+        return self._entries
+
+    def _entry(self, key):
+        return self._load().setdefault(key, {"samples": [], "timeouts": 0})
+
+    @staticmethod
+    def _p99(samples):
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+    def _learned(self, samples):
+        return min(self.ceiling, max(self.floor, self._p99(samples) * self.margin))
+
+    def deadline(self, key, default, floor=None):
+        """Seconds to allow key; default is the hard-coded timeout, used until there is history
+
+        floor, when given, replaces the global TIMEOUT_FLOOR for this key:
+        commands whose cost depends on the workload (a defrag that may only
+        retrim, a restore point) pass their default so a run of quick
+        samples cannot cut the deadline below it.
+        """
+        with self._lock:
+            samples = self._load().get(key, {}).get("samples")
+        if not samples:
+            return default
+        learned = self._learned(samples)
+        if floor is not None:
+            learned = max(floor, learned)
+        if len(samples) < self.min_samples:
+            # Too little history to cut below the default, but enough to grow past it
+            return max(default, learned)
+        return learned
+
+    def record(self, key, seconds, timed_out=False):
+        with self._lock:
+            entry = self._entry(key)
+            entry["samples"] = (entry["samples"] + [round(seconds, 3)])[-self.window:]
+            if timed_out:
+                entry["timeouts"] += 1
+
+    def is_outlier(self, key, seconds):
+        """True when seconds ran past key's learned deadline (only once it has enough samples)"""
+        with self._lock:
+            samples = list(self._load().get(key, {}).get("samples", ()))
+        return len(samples) >= self.min_samples and seconds > self._learned(samples)
+
+    def table(self):
+        """{key: {samples, p50_s, p99_s, deadline_s, timeouts}} for every recorded key"""
+        with self._lock:
+            entries = {key: dict(entry) for key, entry in self._load().items()}
+        table = {}
+        for key, entry in sorted(entries.items()):
+            samples = entry["samples"]
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            table[key] = {
+                "samples": len(samples),
+                "p50_s": ordered[len(ordered) // 2],
+                "p99_s": self._p99(samples),
+                "deadline_s": round(self._learned(samples), 3),
+                "timeouts": entry["timeouts"],
+            }
+        return table
+
+    def save(self):
+        with self._lock:
+            if self._entries is None:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump({"updated": time.time(), "entries": self._entries}, f)
+            except Exception as e:
+                print(f"Timeout history error: {e}")
+
+# ===============================
+# EXECUTION TRACE
+# ===============================
+class _TraceSpan:
+    __slots__ = ("trace", "category", "name", "args", "start")
+
+    def __init__(self, trace, category, name, args):
+        self.trace = trace
+        self.category = category
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = str(exc) or exc_type.__name__
+        thread = current_thread()
+        self.trace.events.append((self.category, self.name, self.start, end, thread.native_id, thread.name, self.args))
+        # An append, not +=, so spans closing on several threads lose no time
+        self.trace.overheads.append(time.perf_counter_ns() - end)
+        return False
+
+class _NullSpan:
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class ExecutionTrace:
+    """In-memory timeline of optimizer steps and the operations inside them
+
+    `with trace.span(category, name, **args) as args:` times a block; the
+    block may add results (bytes, files, exit code) to args. Spans from
+    every thread go into one list (appends are atomic), so recording is a
+    clock read and a tuple append. The time each span spent recording is
+    appended to overheads the same way and totalled by overhead_ns.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        self.overheads = []
+
+    @property
+    def overhead_ns(self):
+        return sum(self.overheads)
+
+    def span(self, category, name, **args):
+        if not self.enabled:
+            return _NullSpan()
+        return _TraceSpan(self, category, name, args)
+
+    def records(self):
+        """Events as dicts, times in ms since the trace started, ordered by start"""
+        return [
+            {
+                "cat": category, "name": name,
+                "start_ms": (start - self.origin) / 1e6, "dur_ms": (end - start) / 1e6,
+                "thread": thread_name, "args": args
+            }
+            for category, name, start, end, _, thread_name, args in sorted(self.events, key=lambda event: event[2])
+        ]
+
+    def summary(self):
+        totals = {}
+        for category, _, start, end, _, _, _ in self.events:
+            total = totals.setdefault(category, {"count": 0, "ms": 0.0})
+            total["count"] += 1
+            total["ms"] += (end - start) / 1e6
+        return {"events": len(self.events), "overhead_ms": self.overhead_ns / 1e6, "categories": totals}
+
+    def export_jsonl(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for record in self.records():
+                f.write(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+
+    def export_chrome(self, path):
+        """Chrome trace_event JSON (complete "X" events), viewable in Perfetto or chrome://tracing"""
+        pid = os.getpid()
+        threads = {}
+        events = []
+        for category, name, start, end, tid, thread_name, args in self.events:
+            threads[tid] = thread_name
+            events.append({
+                "name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000, "args": args
+            })
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}}
+            for tid, thread_name in threads.items()
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": events,
+                "displayTimeUnit": "ms",
+                "otherData": {"app": f"{APP_NAME} {VERSION}", **self.summary()}
+            }, f, separators=(",", ":"), default=str)
+
+    def save(self, directory=None):
+        """Write last_run_trace.jsonl and last_run_trace.json; returns the Chrome trace path"""
+        directory = directory or app_data_dir()
+        try:
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.join(directory, "last_run_trace")
+            self.export_jsonl(base + ".jsonl")
+            self.export_chrome(base + ".json")
+            return base + ".json"
+        except Exception as e:
+            print(f"Trace save error: {e}")
+            return None
+
+# ===============================
+# STEP SCHEDULER
+# ===============================
+def _resource_key(resource):
+    """Split a 'kind:target' resource into a normalized (kind, target) pair"""
+    kind, _, target = resource.partition(":")
+    if kind == "fs":
+        target = os.path.expandvars(target)
+    return kind, target.replace("/", "\\").rstrip("\\").lower()
+
+def resources_conflict(a, b):
+    """Resources conflict when they are the same, or one fs/reg path contains the other"""
+    kind_a, target_a = a
+    kind_b, target_b = b
+    if kind_a != kind_b:
+        return False
+    if target_a == target_b:
+        return True
+    if kind_a in ("fs", "reg"):
+        return target_a.startswith(target_b + "\\") or target_b.startswith(target_a + "\\")
+    return False
+
+class StepScheduler:
+    """Runs optimization steps on a thread pool, serializing only steps whose resources conflict"""
+
+    def __init__(self, steps, max_workers=4):
+        self.steps = steps
+        self.max_workers = max(1, max_workers)
+        self.dependencies = self._build_dependencies()
+
+    def _build_dependencies(self):
+        # Each step waits for every earlier step it shares a resource with,
+        # so conflicting steps still run in their original list order
+        keys = [[_resource_key(r) for r in step[3]] for step in self.steps]
+        dependencies = []
+        for i, mine in enumerate(keys):
+            dependencies.append({
+                j for j in range(i)
+                if any(resources_conflict(a, b) for a in mine for b in keys[j])
+            })
+        return dependencies
+
+    def run(self, execute, on_complete=None, cancel=None):
+        """Call execute(step) for every step; on_complete(step, finished, total) runs on the calling thread
+
+        Once cancel (a CancelToken) is cancelled no further steps start; while
+        it is paused none start until it resumes.
+        """
+        cancel = cancel or CancelToken()
+        total = len(self.steps)
+        waiting_on = [set(deps) for deps in self.dependencies]
+        dependents = [[] for _ in self.steps]
+        for i, deps in enumerate(self.dependencies):
+            for j in deps:
+                dependents[j].append(i)
+
+        ready = [i for i in range(total) if not waiting_on[i]]
+        running = {}
+        finished = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="step") as pool:
+            while ready or running:
+                if not cancel.wait_if_paused():
+                    ready.clear()
+                while ready and len(running) < self.max_workers:
+                    i = ready.pop(0)
+                    running[pool.submit(execute, self.steps[i])] = i
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"Scheduler error: {e}")
+                    finished += 1
+                    for k in dependents[i]:
+                        waiting_on[k].discard(i)
+                        if not waiting_on[k]:
+                            ready.append(k)
+                    if not cancel.cancelled:
+                        ready.sort()
+                    else:
+                        ready.clear()
+                    if on_complete:
+                        on_complete(self.steps[i], finished, total)
+
+# ===============================
+# SIGNALS
+# ===============================
+class Signal:
+    """Qt-free stand-in for pyqtSignal, declared the same way on a class
+
+    Each instance gets its own BoundSignal. Slots run synchronously on the
+    emitting thread; the UI subclass swaps these for real pyqtSignals so its
+    slots are queued to the UI thread instead.
+    """
+
+    def __init__(self, *types):
+        self.types = types
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__.setdefault(self.name, BoundSignal())
+
+class BoundSignal:
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot=None):
+        if slot is None:
+            self._slots.clear()
+        else:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            try:
+                slot(*args)
+            except Exception as e:
+                # Like Qt, a failing slot does not abort the code that emitted
+                print(f"Signal slot error: {e}", file=sys.stderr)
+
+# ===============================
+# PROGRESS CHANNEL
+# ===============================
+class ProgressChannel:
+    """Coalesces worker progress into snapshots sent at most rate_hz times a second
+
+    update() fields are latest-value-wins and only changed fields are sent;
+    errors accumulate, so none is dropped. Snapshots are delivered from one
+    background thread, in order. flush() sends whatever is pending right
+    away and is called before the final done/error signal.
+    """
+
+    def __init__(self, deliver, rate_hz=PROGRESS_RATE_HZ):
+        self.deliver = deliver
+        self.interval = 1.0 / rate_hz
+        self.updates = 0
+        self.snapshots = 0
+        self._pending = {}
+        self._errors = []
+        self._last_sent = 0.0
+        self._cond = Condition()
+        self._thread = None
+        self._closed = False
+
+    def update(self, **fields):
+        with self._cond:
+            self._pending.update(fields)
+            self.updates += 1
+            self._wake()
+
+    def add_error(self, message):
+        with self._cond:
+            self._errors.append(message)
+            self._wake()
+
+    def flush(self):
+        with self._cond:
+            self._send()
+
+    def close(self):
+        with self._cond:
+            self._send()
+            self._closed = True
+            self._cond.notify()
+
+    def _wake(self):
+        if self._thread is None and not self._closed:
+            self._thread = Thread(target=self._run, daemon=True, name="progress")
+            self._thread.start()
+        self._cond.notify()
+
+    def _run(self):
+        with self._cond:
+            while not self._closed:
+                if not (self._pending or self._errors):
+                    self._cond.wait()
+                    continue
+                delay = self._last_sent + self.interval - time.monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                self._send()
+
+    def _send(self):
+        # Called with the condition held, which keeps snapshots in order
+        if not (self._pending or self._errors):
+            return
+        snapshot = dict(self._pending)
+        if self._errors:
+            snapshot["errors"] = list(self._errors)
+        self._pending.clear()
+        self._errors.clear()
+        self._last_sent = time.monotonic()
+        self.snapshots += 1
+        try:
+            self.deliver(snapshot)
+        except Exception as e:
+            print(f"Progress delivery error: {e}", file=sys.stderr)
+
+# ===============================
+# OPTIMIZER WORKER
+# ===============================
+class OptimizerWorker:
+    progress = Signal(int)
+    status = Signal(str)
+    substatus = Signal(str)
+    insight = Signal(str)
+    profile = Signal(dict)
+    done = Signal(dict)
+    undone = Signal(dict)
+    error = Signal(str)
+    # progress/status/substatus/insight coalesced by a ProgressChannel
+    snapshot = Signal(dict)
+
+    def __init__(self, refresh_hardware=False, restore_point=None, trace=None, steps=None, low_impact=None):
+        super().__init__()
+        self.stats = {
+            'cancelled': False,
+            'cleaned_mb': 0,
+            'optimizations_applied': 0,
+            'errors': 0,
+            'skipped': 0,
+            'compliant': 0,
+            'cleaned_files': 0,
+            'duration': 0,
+            'focus': '',
+            'tier': '',
+            'disk_free_gb': 0,
+            'timed_out': [],
+            'slow_steps': [],
+            'low_impact': False
+        }
+        self.ai_profile = {}
+        self.hardware_cache = HardwareProfileCache()
+        self.cancel_token = CancelToken()
+        self.timeouts = TimeoutHistory()
+        self.probe_engine = ProbeEngine(cancel=self.cancel_token, timeouts=self.timeouts)
+        self.refresh_hardware = refresh_hardware
+        # Step function names to run (None runs every step)
+        self.only_steps = set(steps) if steps else None
+        self.restore_point = CREATE_RESTORE_POINT if restore_point is None else restore_point
+        # True/False forces throttled cleanup on or off; None decides from the disk type
+        self.low_impact = LOW_IMPACT_CLEANUP if low_impact is None else low_impact
+        self.journal = ChangeJournal()
+        self.trace = ExecutionTrace(TRACE_EXECUTION if trace is None else trace)
+        self.commands = None
+        self.current_state = None
+        # {path prefix: replacement} applied to cleanup targets
+        self.path_map = {}
+        self.cleanup_plan = load_cleanup_plan()
+        self._targets = None
+        self.deleter = DeletionEngine(progress=self._deletion_progress, cancel=self.cancel_token)
+        self.channel = ProgressChannel(self.snapshot.emit)
+        self.progress.connect(lambda percent: self.channel.update(percent=percent))
+        self.status.connect(lambda text: self.channel.update(status=text))
+        # Insight and substatus share one line in the UI
+        self.substatus.connect(lambda text: self.channel.update(substatus=text))
+        self.insight.connect(lambda text: self.channel.update(substatus=text))
+        self._stats_lock = Lock()
+        self._sweeps = {}
+        self._sweep_locks = {}
+        self._sweep_lock = Lock()
+        self._rule_groups = None
+
+    def cancel(self):
+        """Stop the run from any thread: no new steps, running commands are killed"""
+        self.cancel_token.cancel()
+
+    def pause(self):
+        self.cancel_token.pause()
+
+    def resume(self):
+        self.cancel_token.resume()
+
+    def _terminate_commands(self):
+        if self.commands:
+            self.commands.terminate()
+
+    def _add_stat(self, key, amount):
+        # Steps run on scheduler threads, so counters are updated under a lock
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def _run_step(self, step):
+        step_func, step_name, is_safe, _ = step
+        with self.trace.span("step", step_func.__name__, title=step_name) as span:
+            if not self.cancel_token.wait_if_paused():
+                span["outcome"] = "cancelled"
+                return
+            if SAFE_MODE and not is_safe:
+                self.substatus.emit(f"Skipped (advanced): {step_name}")
+                self._add_stat('skipped', 1)
+                span["outcome"] = "skipped"
+                return
+            try:
+                # Inside the try: a failed registry or folder check is a step error
+                if self._already_compliant(step_func.__name__):
+                    self.substatus.emit(f"Already optimal: {step_name}")
+                    self._add_stat('compliant', 1)
+                    span["outcome"] = "compliant"
+                    return
+                self.status.emit(step_name)
+                started = time.monotonic()
+                step_func()
+                if self.cancel_token.cancelled:
+                    # Stopped part-way; whatever it cleaned is already counted
+                    raise Cancelled()
+                self._record_step_time(step_func.__name__, time.monotonic() - started)
+                self._add_stat('optimizations_applied', 1)
+                span["outcome"] = "applied"
+            except Cancelled:
+                span["outcome"] = "cancelled"
+            except Exception as e:
+                self._add_stat('errors', 1)
+                self.substatus.emit(f"Error in {step_name}: {str(e)}")
+                self.channel.add_error(f"Error in {step_name}: {str(e)}")
+                span["outcome"] = "error"
+                span["error"] = str(e)
+
+    def _record_step_time(self, name, seconds):
+        # Steps are not killed (only their commands are), but ones far past
+        # their usual duration are reported
+        key = f"step:{name}"
+        if self.timeouts.is_outlier(key, seconds):
+            with self._stats_lock:
+                self.stats['slow_steps'].append(name)
+        self.timeouts.record(key, seconds)
+
+    def _step_finished(self, step, finished, total):
+        self.progress.emit(int((finished / total) * 100))
+
+    def run(self):
+        start_time = time.time()
+        self.cancel_token.on_cancel(self._terminate_commands)
+        
+        try:
+            # Get system info
+            self.status.emit("Analyzing system...")
+            self.substatus.emit("Detecting hardware configuration")
+            with self.trace.span("analysis", "get_system_info"):
+                self.sys = self.get_system_info()
+            self.cancel_token.check()
+
+            self.status.emit("AI planning optimization...")
+            self.substatus.emit("Building adaptive optimization profile")
+            self.ai_profile = self.build_ai_profile()
+            self.stats['focus'] = ", ".join(self.ai_profile["focus"])
+            self.stats['tier'] = self.ai_profile["tier"]
+            self.stats['disk_free_gb'] = self.ai_profile["disk_free"]
+            self.insight.emit(self.ai_profile["tagline"])
+            self.profile.emit(self.ai_profile)
+
+            low_impact = self.sys.get("hdd", False) if self.low_impact is None else self.low_impact
+            if low_impact:
+                self.deleter.throttle = IoThrottle(cancel=self.cancel_token)
+                self.stats['low_impact'] = True
+                self.substatus.emit("Low-impact cleanup: deletes paced to keep the disk responsive")
+            
+            # Steps share one persistent shell per scheduler thread
+            workers = TIER_CONCURRENCY.get(self.ai_profile["tier"], 2)
+            self.commands = CommandHostPool(workers)
+
+            # The journal records every setting before it changes; the much
+            # slower system restore point is only created when asked for
+            if self.restore_point and SAFE_MODE:
+                self.create_restore_point()
+            self.cancel_token.check()
+            self.journal.begin()
+
+            # One batched read of every setting the steps manage, so steps
+            # already in their desired state can be skipped
+            self.substatus.emit("Checking current configuration")
+            with self.trace.span("registry", "read_current_state") as span:
+                self.current_state = self.read_current_state()
+                span["values"] = len(self.current_state)
+            
+            # Define optimization steps and run non-conflicting ones concurrently
+            steps = self._selected_steps()
+            StepScheduler(steps, workers).run(self._run_step, self._step_finished, self.cancel_token)
+            self.cancel_token.check()
+            self._finish_run(start_time)
+        except Cancelled:
+            self.stats['cancelled'] = True
+            self.stats['cancel_latency_ms'] = (time.monotonic() - self.cancel_token.cancelled_at) * 1000
+            self._finish_run(start_time)
+        except Exception as e:
+            self.channel.flush()
+            self.error.emit(f"Critical error: {str(e)}")
+        finally:
+            if self.commands:
+                self.commands.close()
+            self.deleter.close()
+            self.journal.close()
+            self.channel.close()
+
+    def _finish_run(self, start_time):
+        """Final stats, complete or partial, delivered through done"""
+        self.stats['duration'] = time.time() - start_time
+        # A shared sweep also deletes the files of steps that run later; if
+        # the run was cancelled before they did, count those files here
+        for totals in self._sweeps.values():
+            for freed, files in totals.values():
+                self.stats['cleaned_mb'] += freed / (1024 * 1024)
+                self.stats['cleaned_files'] += files
+            totals.clear()
+        if self.deleter.throttle:
+            self.stats['throttle_wait_s'] = round(self.deleter.throttle.waited, 2)
+            self.stats['throttle_rate'] = self.deleter.throttle.fraction
+        self.timeouts.save()
+        if self.trace.enabled:
+            self.stats['trace'] = self.trace.save()
+            self.stats['trace_overhead_ms'] = self.trace.overhead_ns / 1e6
+        self.channel.flush()
+        self.stats['progress_updates'] = self.channel.updates
+        self.stats['progress_snapshots'] = self.channel.snapshots
+        self.done.emit(self.stats)
+
+    def undo_last_run(self):
+        """Restore every setting the newest not-yet-undone run changed, newest change first"""
+        summary = {'run': None, 'restored': 0, 'failed': 0}
+        try:
+            self.status.emit("Undoing last run...")
+            run_id, changes = self.journal.last_run()
+            if run_id is None:
+                self.substatus.emit("Nothing to undo")
+                self.channel.flush()
+                self.undone.emit(summary)
+                return
+            summary['run'] = run_id
+            self.substatus.emit(f"Restoring {len(changes)} settings")
+
+            # Registry values go back in one batch; later entries in the batch
+            # win, so replaying in reverse leaves each value at its oldest state
+            batch = RegistryBatch()
+            commands = []
+            for change in reversed(changes):
+                kind, previous = change["kind"], change.get("prev")
+                if isinstance(previous, dict):
+                    previous = bytes.fromhex(previous["hex"])
+                if kind == "reg":
+                    if previous is None:
+                        batch.delete(change["key"], change["name"])
+                    else:
+                        batch.set(change["key"], change["name"], previous, change["type"])
+                elif kind == "service" and previous in SERVICE_START_NAMES:
+                    commands.append(f"sc config {change['name']} start={SERVICE_START_NAMES[previous]}")
+                elif kind == "power" and previous:
+                    commands.append(f"powercfg -setactive {previous}")
+                elif kind == "power_setting" and previous is not None:
+                    scheme = change.get("scheme") or "scheme_current"
+                    commands.append(
+                        f"powercfg -set{change['mode']}valueindex {scheme} {change['subgroup']} {change['setting']} {previous}"
+                    )
+                elif kind == "autotuning" and previous:
+                    commands.append(f"netsh int tcp set global autotuninglevel={previous}")
+
+            for _, _, ok in batch.apply():
+                summary['restored' if ok else 'failed'] += 1
+            for command in commands:
+                try:
+                    result = self._run_command(command, timeout=10)
+                    summary['restored' if result.returncode == 0 else 'failed'] += 1
+                except Exception as e:
+                    summary['failed'] += 1
+                    self.substatus.emit(f"Undo error: {e}")
+                    self.channel.add_error(f"Undo error: {e}")
+            if not summary['failed']:
+                self.journal.mark_undone(run_id)
+            self.channel.flush()
+            self.undone.emit(summary)
+        except Exception as e:
+            self.channel.flush()
+            self.error.emit(f"Undo failed: {str(e)}")
+        finally:
+            if self.commands:
+                self.commands.close()
+                self.commands = None
+            self.journal.close()
+            self.channel.close()
+
+    def _selected_steps(self):
+        """The optimization steps this worker runs: all of them, or the ones named in only_steps"""
+        steps = self._get_optimization_steps()
+        if self.only_steps is not None:
+            steps = [step for step in steps if step[0].__name__ in self.only_steps]
+        return steps
+
+    def _get_optimization_steps(self):
+        """Returns list of (function, name, is_safe, resources) tuples
+
+        Resources are 'kind:target' strings; steps sharing a resource (or a
+        parent fs/reg path) are never run at the same time.
+        """
+        cdm_key = r"reg:HKCU\Software\Microsoft\Windows\CurrentVersion\ContentDeliveryManager"
+        update_services = ("svc:wuauserv", "svc:bits", "svc:dosvc")
+        # Folders and services of the file cleanups come from their rule packs
+        steps = [
+            # AI-guided cleanup
+            (self.clear_crash_dumps, "Clearing crash dumps", True, ()),
+            (self.clear_shader_cache, "Clearing shader cache", True, ()),
+            (self.clear_browser_cache, "Clearing browser caches", True, ()),
+            (self.clear_spooler_cache, "Clearing print spooler cache", True, ()),
+            (self.clear_cbs_logs, "Clearing system servicing logs", True, ()),
+            (self.clear_dism_logs, "Clearing DISM logs", True, ()),
+            (self.clear_icon_cache, "Clearing icon cache", True, ()),
+            (self.clear_windows_update_cache, "Clearing Windows Update cache", True, ()),
+
+            # Cleanup - All Safe
+            (self.clear_temp, "Cleaning temporary files", True, ()),
+            (self.clear_prefetch, "Cleaning prefetch cache", True, ()),
+            (self.clear_recycle_bin, "Emptying Recycle Bin", True, ("recycle:all",)),
+            (self.clear_error_reports, "Clearing error reports", True, ()),
+            (self.clear_windows_logs, "Clearing Windows logs", True, ("evt:all",)),
+            (self.clear_thumbnail_cache, "Clearing thumbnail cache", True, ()),
+            (self.clear_delivery_optimization_cache, "Clearing delivery optimization cache", True, ("svc:dosvc",)),
+            
+            # Network - Safe
+            (self.flush_dns, "Flushing DNS cache", True, ("svc:Dnscache",)),
+            (self.optimize_dns, "Optimizing DNS settings", True,
+             ("svc:Dnscache", r"reg:HKLM\SYSTEM\CurrentControlSet\Services\Dnscache\Parameters")),
+            (self.reset_network, "Resetting network stack", True, ("net:winsock", "net:tcpip")),
+            (self.optimize_adapter_power_saving, "Optimizing network adapter power settings", True,
+             ("power:scheme",)),
+            (self.preserve_core_connectivity_services, "Preserving Wi-Fi/Bluetooth/Update services", True,
+             update_services + ("svc:WlanSvc", "svc:bthserv")),
+            
+            # Disk - Safe (HDD/SSD aware)
+            (self.optimize_disk, "Optimizing storage", True, ("disk:C", "fsutil:behavior")),
+            (self.disable_last_access, "Disabling last access time", True, ("fsutil:behavior",)),
+            (self.optimize_ntfs, "Optimizing NTFS", True, ("fsutil:behavior",)),
+            
+            # System - Safe
+            (self.optimize_visuals, "Optimizing visual effects", True,
+             (r"reg:HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\VisualEffects",)),
+            (self.optimize_explorer, "Optimizing File Explorer", True,
+             (r"reg:HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced",)),
+            (self.optimize_startup, "Optimizing startup", True,
+             (r"reg:HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Serialize",)),
+            (self.reduce_menu_delay, "Reducing menu delays", True, (r"reg:HKCU\Control Panel\Desktop",)),
+            (self.optimize_notifications, "Reducing Windows suggestions", True, (cdm_key,)),
+            (self.enable_storage_sense, "Enabling Storage Sense", True,
+             (r"reg:HKCU\Software\Microsoft\Windows\CurrentVersion\StorageSense",)),
+            (self.optimize_background_apps, "Reducing background app load", True,
+             (r"reg:HKCU\Software\Microsoft\Windows\CurrentVersion\BackgroundAccessApplications",)),
+            
+            # Services - Safe
+            (self.disable_telemetry, "Disabling telemetry", True,
+             ("svc:DiagTrack", r"reg:HKLM\SOFTWARE\Policies\Microsoft\Windows\DataCollection",
+              r"reg:HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\DataCollection")),
+            (self.optimize_windows_search, "Optimizing Windows Search", True,
+             (r"reg:HKLM\SOFTWARE\Microsoft\Windows Search",)),
+            (self.disable_unnecessary_services, "Optimizing services", True,
+             ("svc:DiagTrack", "svc:dmwappushservice")),
+            
+            # Performance - Mostly Safe
+            (self.optimize_power_plan, "Setting high performance plan", True, ("power:scheme",)),
+            (self.optimize_game_mode, "Enabling Game Mode", True, (r"reg:HKCU\Software\Microsoft\GameBar",)),
+            (self.disable_game_dvr, "Disabling Game DVR", True, (r"reg:HKCU\System\GameConfigStore",)),
+        ]
+
+        # Cleanup steps defined only by a rule pack (e.g. in-house tool caches)
+        known = {step[0].__name__ for step in steps}
+        for name in self.cleanup_plan.step_names():
+            if name not in known:
+                info = self.cleanup_plan.steps.get(name, {})
+                title = info.get("title") or name.replace("_", " ").capitalize()
+                steps.append((self._pack_step(name, info.get("status", title)), title, bool(info.get("safe", True)), ()))
+        return [(func, name, is_safe, resources + self.cleanup_plan.resources(func.__name__))
+                for func, name, is_safe, resources in steps]
+    # ===============================
+    # DRY-RUN ANALYSIS
+    # ===============================
+    def analyze(self, index=None):
+        """Estimate what each clear_* step would free without deleting anything
+
+        Returns {step: {"name", "bytes", "files"}}. Directory walks are served
+        from a persistent DirectoryIndex, so repeat analyses only re-list
+        folders whose mtime changed. Rule min-age and recurse settings are
+        not applied, so those rules are estimated as an upper bound.
+        """
+        self.status.emit("Analyzing cleanup targets...")
+        index = index or DirectoryIndex()
+        names = {step[0].__name__: step[1] for step in self._get_optimization_steps()}
+        targets = self._cleanup_targets()
+
+        def measure(step):
+            total_bytes, total_files = 0, 0
+            for directory, pattern, _, _ in targets[step]:
+                if os.path.isdir(directory):
+                    found_bytes, found_files = index.measure(directory, pattern)
+                    total_bytes += found_bytes
+                    total_files += found_files
+            return step, {"name": names.get(step, step), "bytes": total_bytes, "files": total_files}
+
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS, thread_name_prefix="analyze") as pool:
+            results = dict(pool.map(measure, targets))
+        index.save()
+
+        total_mb = sum(result["bytes"] for result in results.values()) / (1024 * 1024)
+        self.substatus.emit(f"About {total_mb:.0f} MB can be freed")
+        return results
+
+    # ===============================
+    # SYSTEM INFO
+    # ===============================
+    def get_system_info(self, refresh=False):
+        # All probes run concurrently under ANALYSIS_DEADLINE. GPU, RAM, CPU and
+        # disk media come from the on-disk profile cache when it is still valid
+        # for this boot, in which case only the live probes (free space) run
+        cached = None if refresh or self.refresh_hardware else self.hardware_cache.lookup()
+        probes = [probe for probe in SYSTEM_PROBES if not (cached and probe.cacheable)]
+        info = self.probe_engine.run(probes)
+        if cached:
+            info.update(cached)
+        elif all(self.probe_engine.report[probe.name]["status"] == "ok"
+                 for probe in probes if probe.cacheable):
+            # Never cache defaults that only stand in for a probe that failed or ran out of time
+            self.hardware_cache.store({
+                key: info[key] for probe in probes if probe.cacheable for key in probe.defaults
+            })
+        info["cores"] = os.cpu_count() or 4
+
+        if not info["has_disk"]:
+            disk_label = "No Disk Detected"
+        elif info["ssd"]:
+            disk_label = "SSD"
+        elif info["hdd"]:
+            disk_label = "HDD"
+        else:
+            disk_label = "Disk"
+
+        source = "cached profile" if self.hardware_cache.hit else "probed"
+        self.substatus.emit(
+            f"{info['cores']} cores | {info['ram']}GB RAM | {info['gpu'].upper()} GPU | {disk_label} ({source})"
+        )
+        timed_out = [name for name, result in self.probe_engine.report.items() if result["status"] == "timeout"]
+        if timed_out:
+            self.substatus.emit(f"Probes over time budget, using defaults: {', '.join(timed_out)}")
+        return info
+
+    def get_disk_free_gb(self, drive="C:\\"):
+        try:
+            usage = shutil.disk_usage(drive)
+            return int(usage.free / (1024 ** 3))
+        except:
+            return 0
+
+    def build_ai_profile(self):
+        disk_free = self.sys["disk_free"] if "disk_free" in self.sys else self.get_disk_free_gb()
+        disk_low = disk_free < 12
+        cores = self.sys.get("cores", 4)
+        ram = self.sys.get("ram", 8)
+        gpu = self.sys.get("gpu", "unknown")
+
+        tier_score = (cores * 1.2) + (ram / 2) + (8 if self.sys.get("ssd") else 0)
+        if tier_score >= 26:
+            tier = "Elite"
+        elif tier_score >= 16:
+            tier = "Balanced"
+        else:
+            tier = "Lite"
+
+        focus = []
+        if disk_low:
+            focus.append("Storage")
+        if ram <= 8:
+            focus.append("Memory")
+        if cores <= 4:
+            focus.append("Responsiveness")
+        if gpu != "unknown":
+            focus.append("Graphics")
+        if not focus:
+            focus.append("System Balance")
+
+        tagline = f"AI Focus: {', '.join(focus)} • Tier: {tier} • Free Space: {disk_free}GB"
+        return {
+            "tier": tier,
+            "focus": focus,
+            "tagline": tagline,
+            "disk_low": disk_low,
+            "disk_free": disk_free,
+            "hardware_cached": self.hardware_cache.hit,
+            "hardware_age": self.hardware_cache.age,
+            "probes": dict(self.probe_engine.report)
+        }
+
+    # ===============================
+    # SYSTEM RESTORE
+    # ===============================
+    def create_restore_point(self):
+        self.status.emit("Creating restore point...")
+        self.substatus.emit("Safety backup before optimization")
+        try:
+            self._run_command(
+                'powershell -Command "Checkpoint-Computer -Description \'23 Optimizer Backup\' -RestorePointType \'MODIFY_SETTINGS\'"',
+                timeout=30, floor=30
+            )
+            self.cancel_token.sleep(1)
+        except Cancelled:
+            raise
+        except:
+            self.substatus.emit("Restore point creation skipped")
+
+    # ===============================
+    # CLEANUP OPERATIONS
+    # ===============================
+    def _cleanup_targets(self):
+        """{clear_* step: [(directory, pattern, min_age_seconds, recurse), ...]} from the rule packs
+
+        Resolved once per worker, after path_map is applied.
+        """
+        if self._targets is None:
+            self._targets = self.cleanup_plan.resolve(self.remap_path if self.path_map else None)
+        return self._targets
+
+    def remap_path(self, path):
+        """Rewrite path through path_map prefixes (longest first), e.g. onto a benchmark sandbox"""
+        for prefix in sorted(self.path_map, key=len, reverse=True):
+            if path.lower().startswith(prefix.lower()) and path[len(prefix):][:1] in ("", "\\", "/"):
+                rest = path[len(prefix):].replace("\\", os.sep).strip(os.sep)
+                return os.path.join(self.path_map[prefix], rest) if rest else self.path_map[prefix]
+        return path
+
+    def clear_temp(self):
+        self.substatus.emit("Removing temporary files")
+        self._clean_step("clear_temp")
+
+    def clear_prefetch(self):
+        self.substatus.emit("Cleaning prefetch to improve boot time")
+        self._clean_step("clear_prefetch")
+
+    def clear_recycle_bin(self):
+        self.substatus.emit("Emptying all recycle bins")
+        self._run_command(
+            "PowerShell.exe -Command Clear-RecycleBin -Force -ErrorAction SilentlyContinue",
+            timeout=10
+        )
+
+    def clear_error_reports(self):
+        self.substatus.emit("Removing error report files")
+        self._clean_step("clear_error_reports")
+
+    def clear_windows_logs(self):
+        self.substatus.emit("Clearing Windows event logs")
+        try:
+            self._run_command(
+                'for /F "tokens=*" %1 in (\'wevtutil.exe el\') DO wevtutil.exe cl "%1"',
+                timeout=10
+            )
+        except:
+            pass
+
+    def clear_thumbnail_cache(self):
+        self.substatus.emit("Clearing thumbnail cache")
+        self._clean_step("clear_thumbnail_cache")
+
+    def clear_spooler_cache(self):
+        self.substatus.emit("Clearing print spooler cache")
+        self._clean_step("clear_spooler_cache")
+
+    def clear_cbs_logs(self):
+        self.substatus.emit("Clearing component servicing logs")
+        self._clean_step("clear_cbs_logs")
+
+    def clear_dism_logs(self):
+        self.substatus.emit("Clearing DISM logs")
+        self._clean_step("clear_dism_logs")
+
+    def clear_crash_dumps(self):
+        self.substatus.emit("Removing crash dump files")
+        self._clean_step("clear_crash_dumps")
+
+    def clear_shader_cache(self):
+        self.substatus.emit("Removing shader cache")
+        self._clean_step("clear_shader_cache")
+
+    def clear_browser_cache(self):
+        self.substatus.emit("Refreshing browser caches")
+        self._clean_step("clear_browser_cache")
+
+    def clear_delivery_optimization_cache(self):
+        self.substatus.emit("Clearing delivery optimization cache")
+        self._clean_step("clear_delivery_optimization_cache")
+
+    def clear_icon_cache(self):
+        self.substatus.emit("Clearing Windows icon cache")
+        self._clean_step("clear_icon_cache")
+
+    def clear_windows_update_cache(self):
+        self.substatus.emit("Clearing Windows Update download cache")
+        self._clean_step("clear_windows_update_cache")
+
+
+    # ===============================
+    # NETWORK OPTIMIZATIONS
+    # ===============================
+    def flush_dns(self):
+        self.substatus.emit("Clearing DNS resolver cache")
+        self._run_command("ipconfig /flushdns")
+
+    def optimize_dns(self):
+        self.substatus.emit("Configuring DNS cache settings")
+        self._apply_state("optimize_dns")
+
+    def reset_network(self):
+        self.substatus.emit("Resetting network stack")
+        # The Winsock and IP resets cannot be undone; auto-tuning can
+        self._journal_autotuning()
+        cmds = [
+            "netsh winsock reset",
+            "netsh int ip reset",
+            "netsh int tcp set global autotuninglevel=normal",
+        ]
+        for cmd in cmds:
+            self._run_command(cmd)
+
+    def optimize_adapter_power_saving(self):
+        self.substatus.emit("Optimizing network adapter power behavior")
+        self._set_power_setting("sub_none", "CONNSTATUS", 1)
+
+    def preserve_core_connectivity_services(self):
+        self.substatus.emit("Ensuring Wi-Fi/Bluetooth/Update services remain enabled")
+        self._apply_state("preserve_core_connectivity_services")
+
+    # ===============================
+    # DISK OPTIMIZATIONS (SSD/HDD Aware)
+    # ===============================
+    def optimize_disk(self):
+        if not self.sys.get("has_disk", True):
+            self.substatus.emit("No storage device detected - skipping storage optimization")
+            return
+
+        if self.sys.get("ssd"):
+            self.substatus.emit("Optimizing SSD (TRIM enabled)")
+            # Enable TRIM
+            self._set_fsutil("DisableDeleteNotify", 0)
+            # Optimize SSD; a retrim can be quick one run and slow the next
+            self._run_command("defrag C: /L /O", timeout=30, floor=30)
+        elif self.sys.get("hdd"):
+            self.substatus.emit("Optimizing HDD (defragmentation)")
+            # Quick defrag for HDD
+            self._run_command("defrag C: /U /V", timeout=60, floor=60)
+        else:
+            self.substatus.emit("Storage type unknown - skipping defrag/TRIM for safety")
+
+    def disable_last_access(self):
+        self.substatus.emit("Disabling last access time tracking")
+        self._set_fsutil("disablelastaccess", 1)
+
+    def optimize_ntfs(self):
+        self.substatus.emit("Optimizing NTFS performance")
+        self._set_fsutil("memoryusage", 2)
+        self._set_fsutil("mftzone", 2)
+
+    # ===============================
+    # VISUAL & UI OPTIMIZATIONS
+    # ===============================
+    def optimize_visuals(self):
+        self.substatus.emit("Adjusting visual effects for performance")
+        self._apply_state("optimize_visuals")
+
+    def optimize_explorer(self):
+        self.substatus.emit("Optimizing File Explorer")
+        self._apply_state("optimize_explorer")
+
+    def optimize_startup(self):
+        self.substatus.emit("Reducing startup delays")
+        self._apply_state("optimize_startup")
+
+    def reduce_menu_delay(self):
+        self.substatus.emit("Reducing menu show delay")
+        self._apply_state("reduce_menu_delay")
+
+    def optimize_notifications(self):
+        self.substatus.emit("Reducing Windows tips and suggestions")
+        self._apply_state("optimize_notifications")
+
+    def optimize_background_apps(self):
+        self.substatus.emit("Reducing background app activity")
+        self._apply_state("optimize_background_apps")
+
+    def enable_storage_sense(self):
+        self.substatus.emit("Enabling Storage Sense automation")
+        self._apply_state("enable_storage_sense")
+
+    # ===============================
+    # SERVICES & TELEMETRY
+    # ===============================
+    def disable_telemetry(self):
+        self.substatus.emit("Disabling telemetry and diagnostics")
+        # Policy values plus the DiagTrack service
+        self._apply_state("disable_telemetry")
+
+    def optimize_windows_search(self):
+        self.substatus.emit("Optimizing Windows Search indexing")
+        self._apply_state("optimize_windows_search")
+
+    def disable_unnecessary_services(self):
+        self.substatus.emit("Disabling unnecessary background services")
+        # Only disable truly safe services (see _desired_state)
+        self._apply_state("disable_unnecessary_services")
+
+    # ===============================
+    # PERFORMANCE OPTIMIZATIONS
+    # ===============================
+    def optimize_power_plan(self):
+        self.substatus.emit("Setting high performance power plan")
+        self._apply_state("optimize_power_plan")
+
+    def optimize_game_mode(self):
+        self.substatus.emit("Enabling Windows Game Mode")
+        self._apply_state("optimize_game_mode")
+
+    def disable_game_dvr(self):
+        self.substatus.emit("Disabling Game DVR for better FPS")
+        self._apply_state("disable_game_dvr")
+
+    # ===============================
+    # DESIRED STATE
+    # ===============================
+    def _desired_state(self):
+        """Returns {step name: [state items]} for every configuration step
+
+        Items are ("reg", key_path, value_name, value, value_type),
+        ("service", name, start_type) or ("power", scheme_guid).
+        """
+        explorer_advanced = r"HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\Advanced"
+        cdm = r"HKCU\Software\Microsoft\Windows\CurrentVersion\ContentDeliveryManager"
+        return {
+            "optimize_dns": [
+                ("reg", r"HKLM\SYSTEM\CurrentControlSet\Services\Dnscache\Parameters", "MaxCacheTtl", 86400, REG_DWORD)
+            ],
+            "preserve_core_connectivity_services": [
+                ("service", "wuauserv", "demand"),
+                ("service", "bits", "demand"),
+                ("service", "dosvc", "demand"),
+                ("service", "WlanSvc", "auto"),
+                ("service", "bthserv", "demand")
+            ],
+            "optimize_visuals": [
+                ("reg", r"HKCU\Software\Microsoft\Windows\CurrentVersion\Explorer\VisualEffects", "VisualFXSetting", 2, REG_DWORD)
+            ],
+            "optimize_explorer": [
+                ("reg", explorer_advanced, "LaunchTo", 1, REG_DWORD),
+                ("reg", explorer_advanced, "ShowSyncProviderNotifications", 0, REG_DWORD)
+            ],
+            "optimize_startup": [
+                ("reg", r"HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Explorer\Serialize", "StartupDelayInMSec", 0, REG_DWORD)
+            ],
+            "reduce_menu_delay": [("reg", r"HKCU\Control Panel\Desktop", "MenuShowDelay", "0", REG_SZ)],
+            "optimize_notifications": [
+                ("reg", cdm, "SubscribedContent-338389Enabled", 0, REG_DWORD),
+                ("reg", cdm, "SubscribedContent-338388Enabled", 0, REG_DWORD),
+                ("reg", cdm, "SystemPaneSuggestionsEnabled", 0, REG_DWORD)
+            ],
+            "optimize_background_apps": [
+                ("reg", r"HKCU\Software\Microsoft\Windows\CurrentVersion\BackgroundAccessApplications", "GlobalUserDisabled", 1, REG_DWORD)
+            ],
+            "enable_storage_sense": [
+                ("reg", r"HKCU\Software\Microsoft\Windows\CurrentVersion\StorageSense\Parameters\StoragePolicy", "01", 1, REG_DWORD)
+            ],
+            "disable_telemetry": [
+                ("reg", r"HKLM\SOFTWARE\Policies\Microsoft\Windows\DataCollection", "AllowTelemetry", 0, REG_DWORD),
+                ("reg", r"HKLM\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\DataCollection", "AllowTelemetry", 0, REG_DWORD),
+                ("service", "DiagTrack", "disabled")
+            ],
+            "optimize_windows_search": [
+                ("reg", r"HKLM\SOFTWARE\Microsoft\Windows Search", "SetupCompletedSuccessfully", 0, REG_DWORD)
+            ],
+            "disable_unnecessary_services": [
+                ("service", "DiagTrack", "disabled"),
+                ("service", "dmwappushservice", "disabled")
+            ],
+            "optimize_power_plan": [("power", HIGH_PERFORMANCE_SCHEME)],
+            "optimize_game_mode": [
+                ("reg", r"HKCU\Software\Microsoft\GameBar", "AutoGameModeEnabled", 1, REG_DWORD)
+            ],
+            "disable_game_dvr": [
+                ("reg", r"HKCU\System\GameConfigStore", "GameDVR_Enabled", 0, REG_DWORD)
+            ]
+        }
+
+    @staticmethod
+    def _state_location(item):
+        """Registry value holding an item's current state, and the value that means compliant"""
+        kind = item[0]
+        if kind == "reg":
+            return item[1], item[2], item[3]
+        if kind == "service":
+            return f"{SERVICES_KEY}\\{item[1]}", "Start", SERVICE_START_TYPES[item[2]]
+        return POWER_SCHEMES_KEY, "ActivePowerScheme", item[1]
+
+    def read_current_state(self):
+        """Batched registry read of every location named in _desired_state"""
+        locations = {
+            self._state_location(item)[:2]
+            for items in self._desired_state().values() for item in items
+        }
+        return SafeRegistry.backup_values(locations)
+
+    def _pending_changes(self, step):
+        """State items of a step that differ from the current state (all of them if unread)"""
+        items = self._desired_state().get(step, [])
+        if self.current_state is None:
+            return items
+        pending = []
+        for item in items:
+            key_path, value_name, expected = self._state_location(item)
+            current = self.current_state.get((key_path, value_name))
+            if current is None or str(current).lower() != str(expected).lower():
+                pending.append(item)
+        return pending
+
+    def _already_compliant(self, step):
+        if step in self._desired_state():
+            return self.current_state is not None and not self._pending_changes(step)
+        if self.cleanup_plan.services(step):
+            # Skip the service stop/start round trip when there is nothing to delete
+            return not self._has_cleanup_work(step)
+        return False
+
+    def _has_cleanup_work(self, step):
+        for directory, *_ in self._cleanup_targets().get(step, []):
+            try:
+                with os.scandir(directory) as entries:
+                    if next(entries, None) is not None:
+                        return True
+            except OSError:
+                pass
+        return False
+
+    def _apply_state(self, step):
+        """Bring a step's declared settings to their desired values, touching only those that differ"""
+        changes = self._pending_changes(step)
+        writes = [item[1:] for item in changes if item[0] == "reg"]
+        if writes:
+            self._apply_registry(writes)
+        for item in changes:
+            if item[0] == "service":
+                self._set_service_start(item[1], item[2])
+            elif item[0] == "power":
+                self._set_power_scheme(item[1])
+
+    # ===============================
+    # COMMAND / REGISTRY HELPERS
+    # ===============================
+    def _run_command(self, command, timeout=5, floor=None):
+        """Run a shell command on the shared persistent command host
+
+        timeout is the fallback; once the command has history its deadline
+        comes from self.timeouts, and a command killed there is listed in
+        stats['timed_out']. floor is the least the learned deadline may be.
+
+        Raises Cancelled instead of starting a command once the run is
+        cancelled, and after a command killed by the cancel.
+        """
+        self.cancel_token.check()
+        if self.commands is None:
+            self.commands = CommandHostPool()
+        key = f"command:{command}"
+        deadline = self.timeouts.deadline(key, timeout, floor)
+        with self.trace.span("command", command, deadline=round(deadline, 3)) as span:
+            started = time.monotonic()
+            try:
+                result = self.commands.run(command, deadline)
+            except subprocess.TimeoutExpired:
+                self.timeouts.record(key, deadline, timed_out=True)
+                with self._stats_lock:
+                    self.stats['timed_out'].append(command)
+                raise
+            span["exit_code"] = result.returncode
+        self.cancel_token.check()
+        self.timeouts.record(key, time.monotonic() - started)
+        return result
+
+    def _apply_registry(self, writes):
+        """Apply (key_path, value_name, value[, value_type]) writes in one in-process batch"""
+        batch = RegistryBatch(journal=self.journal)
+        for write in writes:
+            batch.set(*write)
+        with self.trace.span("registry", "apply", writes=len(writes)) as span:
+            results = batch.apply()
+            span["failed"] = sum(1 for _, _, ok in results if not ok)
+        failed = [value_name for _, value_name, ok in results if not ok]
+        if failed and len(failed) == len(results):
+            raise RuntimeError(f"registry write failed: {', '.join(failed)}")
+        if failed:
+            self.substatus.emit(f"Could not set {', '.join(failed)}")
+        return results
+
+    # ===============================
+    # JOURNALED CHANGES
+    # ===============================
+    def _set_service_start(self, name, start):
+        previous = SafeRegistry.backup_value(f"{SERVICES_KEY}\\{name}", "Start")
+        self.journal.record("service", name=name, prev=previous)
+        self._run_command(f"sc config {name} start={start}")
+
+    def _set_power_scheme(self, guid):
+        previous = SafeRegistry.backup_value(POWER_SCHEMES_KEY, "ActivePowerScheme")
+        self.journal.record("power", prev=previous)
+        self._run_command(f"powercfg -setactive {guid}")
+
+    def _set_power_setting(self, subgroup, setting, index):
+        """Set a power setting's AC and DC index on the active scheme"""
+        scheme = SafeRegistry.backup_value(POWER_SCHEMES_KEY, "ActivePowerScheme")
+        try:
+            output = self._run_command(f"powercfg /q scheme_current {subgroup} {setting}").stdout
+        except Exception:
+            output = ""
+        for mode in ("ac", "dc"):
+            found = re.search(rf"Current {mode} Power Setting Index:\s*0x([0-9a-f]+)", output, re.IGNORECASE)
+            self.journal.record("power_setting", scheme=scheme, subgroup=subgroup, setting=setting,
+                                mode=mode, prev=int(found.group(1), 16) if found else None)
+            self._run_command(f"powercfg -set{mode}valueindex scheme_current {subgroup} {setting} {index}")
+
+    def _set_fsutil(self, setting, value):
+        """`fsutil behavior set`, journaling the registry value it writes"""
+        value_name = FSUTIL_SETTINGS[setting]
+        previous, previous_type = SafeRegistry.read_value(FILESYSTEM_KEY, value_name)
+        self.journal.record("reg", key=FILESYSTEM_KEY, name=value_name, prev=previous, type=previous_type)
+        self._run_command(f"fsutil behavior set {setting} {value}")
+
+    def _journal_autotuning(self):
+        try:
+            output = self._run_command("netsh int tcp show global").stdout
+        except Exception:
+            output = ""
+        found = re.search(r"Auto-Tuning Level\s*:\s*(\w+)", output, re.IGNORECASE)
+        self.journal.record("autotuning", prev=found.group(1).lower() if found else None)
+
+    # ===============================
+    # SAFE DELETE HELPERS
+    # ===============================
+    def _clean_step(self, step):
+        """Stop the services a step's rules name, delete its targets, then start them again"""
+        services = self.cleanup_plan.services(step)
+        for svc in services:
+            try:
+                # How long a stop takes is up to the service, so never learn below 10 s
+                self._run_command(f"net stop {svc}", timeout=10, floor=10)
+            except Cancelled:
+                raise
+            except:
+                pass
+        running = [svc for svc in services if not self._service_stopped(svc)]
+        if not running:
+            self._add_stat('cleaned_mb', self._clean_targets(step))
+        for svc in services:
+            try:
+                self._run_command(f"net start {svc}", timeout=10, floor=10)
+            except Cancelled:
+                raise
+            except:
+                pass
+        if running:
+            # Their files may still be open; leave them for the next run
+            raise RuntimeError(f"service still running, nothing deleted: {', '.join(running)}")
+
+    def _service_stopped(self, svc):
+        """True when svc is stopped or not installed"""
+        try:
+            result = self._run_command(f"sc query {svc}", timeout=10)
+        except Cancelled:
+            raise
+        except:
+            return False
+        # 1060: no such service, so nothing can hold its files
+        return result.returncode == 1060 or "STOPPED" in result.stdout.upper()
+
+    def _pack_step(self, step, status):
+        """Step function for a cleanup step that exists only in a rule pack"""
+        def run():
+            self.substatus.emit(status)
+            self._clean_step(step)
+        run.__name__ = step
+        return run
+
+    def _clean_targets(self, step):
+        """Delete every target of a clear_* step; returns MB freed, nested folders included"""
+        bytes_freed = 0
+        for directory, *rule in self._cleanup_targets().get(step, []):
+            if not os.path.isdir(directory):
+                continue
+            # Taken out so _finish_run can credit totals no step collected
+            freed, files = self._sweep(directory).pop((step, *rule), (0, 0))
+            bytes_freed += freed
+            self._add_stat('cleaned_files', files)
+        return bytes_freed / (1024 * 1024)
+
+    def _sweep(self, directory):
+        """Scan directory once for every cleanup rule that targets it
+
+        Steps sharing a folder (thumbnail and icon caches both live in
+        Explorer) are serviced by the first sweep; later steps collect their
+        share from the stored per-rule totals. Only the rules of steps this
+        worker runs are applied, so a deselected or SAFE_MODE-skipped step's
+        files are left alone.
+        """
+        key = os.path.normcase(os.path.abspath(directory))
+        with self._sweep_lock:
+            if self._rule_groups is None:
+                runs = {step[0].__name__ for step in self._selected_steps() if step[2] or not SAFE_MODE}
+                groups = {}
+                for step, targets in self._cleanup_targets().items():
+                    if step not in runs:
+                        continue
+                    for path, *rule in targets:
+                        groups.setdefault(os.path.normcase(os.path.abspath(path)), {})[(step, *rule)] = None
+                self._rule_groups = {group: list(rules) for group, rules in groups.items()}
+            lock = self._sweep_locks.setdefault(key, Lock())
+        with lock:
+            if key not in self._sweeps:
+                rules = self._rule_groups[key]
+                with self.trace.span("fs", directory, rules=len(rules)) as span:
+                    totals = self.deleter.sweep(directory, [rule[1:] for rule in rules])
+                    span["bytes"] = sum(freed for freed, _ in totals)
+                    span["files"] = sum(files for _, files in totals)
+                self._sweeps[key] = dict(zip(rules, totals))
+            return self._sweeps[key]
+
+    def _deletion_progress(self, label, files, bytes_freed):
+        self.substatus.emit(f"Removing {label}: {files:,} files • {bytes_freed / (1024 * 1024):.1f} MB")
+
+
+# ===============================
+# HEADLESS RUNNER
+# ===============================
+class JsonLineWriter:
+    """Writes one JSON object per line; slots call it from worker threads"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = Lock()
+
+    def __call__(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+def connect_json_events(worker, write):
+    worker.progress.connect(lambda percent: write("progress", percent=percent))
+    worker.status.connect(lambda text: write("status", text=text))
+    worker.substatus.connect(lambda text: write("substatus", text=text))
+    worker.insight.connect(lambda text: write("insight", text=text))
+    worker.profile.connect(lambda profile: write("profile", profile=profile))
+    worker.done.connect(lambda stats: write("done", stats=stats))
+    worker.undone.connect(lambda summary: write("undone", summary=summary))
+    worker.error.connect(lambda message: write("error", message=message))
+
+def run_headless(argv=None):
+    """Run the optimizer without a UI; returns the process exit code
+
+    Exit codes: 0 success, 1 critical error or failed steps, 2 bad
+    arguments or missing administrator rights, 130 cancelled with Ctrl+C
+    (partial stats are still reported).
+    """
+    parser = argparse.ArgumentParser(
+        prog="23.py --headless",
+        description=f"{APP_NAME} {VERSION} headless runner: JSON lines on stdout, diagnostics on stderr")
+    parser.add_argument("--steps", nargs="+", metavar="STEP", help="only run these steps (names from --list-steps)")
+    parser.add_argument("--list-steps", action="store_true", help="print the available steps and exit")
+    parser.add_argument("--analyze", action="store_true", help="estimate what the cleanup steps would free and exit")
+    parser.add_argument("--undo", action="store_true", help="undo the last run")
+    parser.add_argument("--restore-point", action="store_true", help="create a system restore point first")
+    parser.add_argument("--refresh-hardware", action="store_true", help="ignore the cached hardware profile")
+    parser.add_argument("--no-trace", action="store_true", help="do not record an execution trace")
+    parser.add_argument("--timeouts", action="store_true", help="print the learned per-command timeouts and exit")
+    parser.add_argument("--low-impact", choices=("auto", "on", "off"), default="auto",
+                        help="throttle deletes at background priority (auto: on for HDD systems)")
+    args = parser.parse_args(argv)
+
+    write = JsonLineWriter(sys.stdout)
+    # Anything else printed (step diagnostics) must not corrupt the JSON stream
+    sys.stdout = sys.stderr
+    worker = None
+    try:
+        worker = OptimizerWorker(refresh_hardware=args.refresh_hardware, restore_point=args.restore_point,
+                                 trace=False if args.no_trace else None, steps=args.steps,
+                                 low_impact={"auto": None, "on": True, "off": False}[args.low_impact])
+        steps = worker._get_optimization_steps()
+        if args.list_steps:
+            for step_func, name, is_safe, resources in steps:
+                write("step", name=step_func.__name__, title=name, safe=is_safe, resources=list(resources))
+            return 0
+        if args.timeouts:
+            for key, entry in worker.timeouts.table().items():
+                write("timeout", key=key, **entry)
+            return 0
+        unknown = sorted(set(args.steps or ()) - {step[0].__name__ for step in steps})
+        if unknown:
+            write("error", message=f"Unknown steps: {', '.join(unknown)}")
+            return 2
+        connect_json_events(worker, write)
+        if args.analyze:
+            write("analysis", steps=worker.analyze())
+            return 0
+        if os.name == "nt" and not is_admin():
+            write("error", message="Administrator privileges are required")
+            return 2
+
+        outcome = {}
+        worker.done.connect(lambda stats: outcome.setdefault("stats", stats))
+        worker.undone.connect(lambda summary: outcome.setdefault("undone", summary))
+        worker.error.connect(lambda message: outcome.setdefault("error", message))
+        if args.undo:
+            worker.undo_last_run()
+            return 1 if "error" in outcome or outcome.get("undone", {}).get("failed") else 0
+        signal.signal(signal.SIGINT, lambda signum, frame: worker.cancel())
+        worker.run()
+        if outcome.get("stats", {}).get("cancelled"):
+            return 130
+        return 1 if "error" in outcome or outcome.get("stats", {}).get("errors") else 0
+    finally:
+        if worker:
+            worker.deleter.close()
+        sys.stdout = write.stream
+
+if __name__ == "__main__":
+    sys.exit(run_headless())